@@ -0,0 +1,233 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from statistics import mean, median
+from typing import Callable, Dict, List
+
+import pygame
+
+from classes.editor import TextEditor
+from classes.glyph_cache import GlyphCache
+from classes.stopwatch import Stopwatch
+from constants import FONT_PATH, FONT_SIZE
+from game import draw, openFile, saveFile
+from game import setup as setupGame
+
+SIZES: Dict[str, int] = {'10KB': 10 * 1024,
+                         '1MB': 1024 * 1024, '10MB': 10 * 1024 * 1024}
+
+
+def setup(grid_size_x: int = 80, grid_size_y: int = 40):
+    pygame.init()
+
+    font = pygame.font.Font(FONT_PATH, FONT_SIZE)
+
+    glyph_cache = GlyphCache(font, FONT_PATH, FONT_SIZE)
+
+    text_editor = TextEditor(font, grid_size_x, grid_size_y, glyph_cache)
+
+    screen = pygame.display.set_mode(
+        (text_editor.getWidth(), text_editor.getHeight()))
+
+    return screen, text_editor
+
+
+def makeText(size: int, line_length: int = 80, seed: int = 0):
+    generator = random.Random(seed)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz      .,;:()[]0123456789'
+    lines: List[str] = []
+    length = 0
+
+    while length < size:
+        line = ''.join(generator.choice(alphabet)
+                       for _ in range(generator.randrange(line_length // 2, line_length)))
+        lines.append(line)
+        length += len(line) + 1
+
+    return '\n'.join(lines)[:size]
+
+
+def measure(function: Callable[[], None], repeat: int = 1):
+    samples: List[float] = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+
+    return {'repeat': repeat,
+            'mean_ms': mean(samples),
+            'median_ms': median(samples),
+            'p95_ms': samples[min(int(len(samples) * 0.95), len(samples) - 1)],
+            'max_ms': samples[-1]}
+
+
+def benchmarkStartup(repeat: int):
+    stopwatch = Stopwatch()
+
+    def startup():
+        nonlocal stopwatch
+
+        with tempfile.TemporaryDirectory() as directory:
+            stopwatch = Stopwatch()
+            screen, buffers, file_worker = setupGame(
+                os.path.join(directory, 'journal'), stopwatch)
+            text_editor = buffers.getActive()
+            text_editor.markAllDirty()
+            draw(text_editor, screen, file_worker)
+            stopwatch.mark('first frame')
+
+            file_worker.shutdown()
+            text_editor.getJournal().discard()
+
+    result = measure(startup, repeat)
+
+    return {'name': 'startup', **result,
+            'phases_ms': {name: elapsed * 1000 for name, elapsed in stopwatch.getMarks()}}
+
+
+def benchmarkKeystrokes(repeat: int):
+    screen, text_editor = setup()
+
+    def keystroke():
+        text_editor.record()
+        text_editor.fillString('a')
+        draw(text_editor, screen)
+
+    return {'name': 'keystroke', **measure(keystroke, repeat)}
+
+
+def benchmarkScrolling(size: int, label: str, repeat: int):
+    screen, text_editor = setup()
+    text_editor.fillString(makeText(size))
+    text_editor.setViewport(0, 0)
+    draw(text_editor, screen)
+
+    def scroll():
+        text_editor.scrollDown()
+        draw(text_editor, screen)
+
+    def pageScroll():
+        text_editor.scrollBy(0, text_editor.getHeight())
+        draw(text_editor, screen)
+
+    return [{'name': 'scroll', 'size': label, **measure(scroll, repeat)},
+            {'name': 'page_scroll', 'size': label, **measure(pageScroll, repeat)}]
+
+
+def benchmarkPaste(size: int, label: str):
+    _, text_editor = setup()
+    text = makeText(size)
+
+    def paste():
+        text_editor.record()
+        text_editor.fillString(text)
+        text_editor.record()
+
+    result = {'name': 'paste', 'size': label, **measure(paste)}
+
+    undo = {'name': 'undo', 'size': label, **measure(text_editor.undo)}
+    redo = {'name': 'redo', 'size': label, **measure(text_editor.redo)}
+
+    return [result, undo, redo]
+
+
+def benchmarkOpen(size: int, label: str):
+    _, text_editor = setup()
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as file:
+        file.write(makeText(size))
+
+    try:
+        result = {'name': 'open', 'size': label, **
+                  measure(lambda: openFile(text_editor, file.name))}
+
+        save = {'name': 'save', 'size': label, **
+                measure(lambda: saveFile(text_editor, file.name + '.out'))}
+    finally:
+        text_editor.closeMapped()
+        os.remove(file.name)
+
+        if os.path.exists(file.name + '.out'):
+            os.remove(file.name + '.out')
+
+    return [result, save]
+
+
+def benchmarkContent(size: int, label: str, repeat: int):
+    _, text_editor = setup()
+    text_editor.fillString(makeText(size))
+
+    return {'name': 'get_content', 'size': label, **measure(text_editor.getContent, repeat)}
+
+
+def benchmarkFrame(size: int, label: str, repeat: int):
+    screen, text_editor = setup()
+    text_editor.fillString(makeText(size))
+    text_editor.setViewport(0, 0)
+
+    def frame():
+        text_editor.markAllDirty()
+        draw(text_editor, screen)
+
+    return {'name': 'frame', 'size': label, **measure(frame, repeat)}
+
+
+def run(paste_sizes: List[str], open_sizes: List[str], repeat: int):
+    results: List[Dict] = [benchmarkStartup(min(repeat, 10)),
+                           benchmarkKeystrokes(repeat)]
+
+    for label in paste_sizes:
+        size = SIZES[label]
+
+        results.extend(benchmarkPaste(size, label))
+        results.extend(benchmarkScrolling(size, label, repeat))
+        results.append(benchmarkContent(size, label, 3))
+        results.append(benchmarkFrame(size, label, repeat))
+
+    for label in open_sizes:
+        results.extend(benchmarkOpen(SIZES[label], label))
+
+    return {'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'video_driver': pygame.display.get_driver(),
+            'timestamp': time.time(),
+            'results': results}
+
+
+def main():
+    parser = ArgumentParser(
+        description='Headless performance benchmarks for the editor core.')
+    parser.add_argument('--paste-sizes', nargs='*',
+                        default=['10KB', '1MB'], choices=SIZES.keys())
+    parser.add_argument('--open-sizes', nargs='*',
+                        default=['10KB', '1MB', '10MB'], choices=SIZES.keys())
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    report = run(args.paste_sizes, args.open_sizes, max(args.repeat, 1))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+import os
+from typing import Callable, List
+
+from classes.editor import TextEditor
+from classes.journal import Journal
+from constants import PACKED_HISTORY_CHANGES, PACKED_HISTORY_ENTRIES
+
+
+class BufferList(object):
+    def __init__(self, text_editor: TextEditor, journal_path: str = None):
+        self.buffers: List[TextEditor] = [text_editor]
+        self.active = 0
+        self.journal_path = journal_path
+
+    def getBuffers(self):
+        return self.buffers
+
+    def getCount(self):
+        return len(self.buffers)
+
+    def getActiveIndex(self):
+        return self.active
+
+    def getActive(self):
+        return self.buffers[self.active]
+
+    def getJournalPath(self):
+        if not self.journal_path:
+            return None
+
+        used = {journal.getPath() for text_editor in self.buffers
+                if (journal := text_editor.getJournal())}
+        index = 1
+
+        while f'{self.journal_path}.{index}' in used:
+            index += 1
+
+        return f'{self.journal_path}.{index}'
+
+    def getJournalPaths(self):
+        if not self.journal_path:
+            return []
+
+        directory = os.path.dirname(os.path.abspath(self.journal_path))
+        prefix = os.path.basename(self.journal_path) + '.'
+        indices: List[int] = []
+
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and (suffix := name[len(prefix):].split('.')[0]).isdigit():
+                indices.append(int(suffix))
+
+        return [f'{self.journal_path}.{index}' for index in sorted(set(indices))]
+
+    def createBuffer(self):
+        active = self.getActive()
+        text_editor = TextEditor(active.getFont(), *active.getGridSizes(),
+                                 active.getGlyphCache())
+
+        if (path := self.getJournalPath()):
+            text_editor.setJournal(Journal(path))
+
+        return self.addBuffer(text_editor)
+
+    def addBuffer(self, text_editor: TextEditor):
+        self.buffers.append(text_editor)
+        self.switchTo(len(self.buffers) - 1)
+
+        return text_editor
+
+    def recoverBuffers(self):
+        for path in self.getJournalPaths():
+            journal = Journal(path)
+
+            if not journal.exists():
+                continue
+
+            active = self.getActive()
+            text_editor = TextEditor(active.getFont(), *active.getGridSizes(),
+                                     active.getGlyphCache())
+            text_editor.replayJournal(journal)
+            text_editor.setJournal(journal)
+            text_editor.pack(PACKED_HISTORY_ENTRIES, PACKED_HISTORY_CHANGES)
+
+            self.buffers.append(text_editor)
+
+    def apply(self, text_editor: TextEditor, function: Callable[[TextEditor], None]):
+        if text_editor not in self.buffers:
+            return False
+
+        if text_editor.isPacked():
+            text_editor.unpack()
+            function(text_editor)
+            text_editor.pack(PACKED_HISTORY_ENTRIES, PACKED_HISTORY_CHANGES)
+        else:
+            function(text_editor)
+
+        return True
+
+    def switchTo(self, index: int):
+        index %= len(self.buffers)
+
+        if index == self.active:
+            return
+
+        previous = self.getActive()
+        previous.pack(PACKED_HISTORY_ENTRIES, PACKED_HISTORY_CHANGES)
+
+        self.active = index
+
+        text_editor = self.getActive()
+        text_editor.unpack()
+        text_editor.setGridSizes(previous.getWidth() // text_editor.getUnitSizeX(),
+                                 previous.getHeight() // text_editor.getUnitSizeY())
+        text_editor.markCanvasDirty()
+
+    def switchBy(self, offset: int):
+        self.switchTo(self.active + offset)
+
+    def closeActive(self):
+        if len(self.buffers) == 1:
+            return False
+
+        closed = self.buffers.pop(self.active)
+
+        if (journal := closed.getJournal()):
+            journal.discard()
+
+        closed.closeMapped()
+
+        self.active = min(self.active, len(self.buffers) - 1)
+
+        text_editor = self.getActive()
+        text_editor.unpack()
+        text_editor.setGridSizes(closed.getWidth() // text_editor.getUnitSizeX(),
+                                 closed.getHeight() // text_editor.getUnitSizeY())
+        text_editor.markCanvasDirty()
+
+        return True
+
+    def discardJournals(self):
+        for text_editor in self.buffers:
+            if (journal := text_editor.getJournal()):
+                journal.discard()
@@ -1,4 +1,5 @@
-from typing import Dict, Tuple, TypeVar, Generic
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Tuple, TypeVar, Generic
 
 T = TypeVar('T')
 
@@ -6,29 +7,127 @@ T = TypeVar('T')
 class Canvas(Generic[T]):
 
     def __init__(self, drawables: Dict[Tuple[int, int], T]):
-        self.drawables = drawables
+        self.setDrawables(drawables)
 
     def getDrawables(self):
         return self.drawables
 
     def setDrawables(self, drawables: Dict[Tuple[int, int], T]):
         self.drawables = drawables
+        self.rows: Dict[int, List[int]] = {}
+        self.row_keys: List[int] = []
+
+        for x, y in sorted(drawables.keys(), key=lambda position: (position[1], position[0])):
+            if y not in self.rows:
+                self.rows[y] = []
+                self.row_keys.append(y)
+
+            self.rows[y].append(x)
+
+    def copy(self):
+        return Canvas[T](dict(self.drawables))
+
+    def getCount(self):
+        return len(self.drawables)
 
     def getDrawable(self, position: Tuple[int, int]):
         return self.drawables.get(position)
 
     def setDrawable(self, position: Tuple[int, int], drawable: T):
+        if position not in self.drawables:
+            x, y = position
+
+            if y not in self.rows:
+                self.rows[y] = []
+                insort(self.row_keys, y)
+
+            insort(self.rows[y], x)
+
         self.drawables[position] = drawable
 
+    def updateDrawables(self, drawables: Dict[Tuple[int, int], T]):
+        for position, drawable in drawables.items():
+            self.setDrawable(position, drawable)
+
+    def applyDrawables(self, drawables: Dict[Tuple[int, int], Optional[T]]):
+        for position, drawable in drawables.items():
+            if drawable is None:
+                self.deleteDrawable(position)
+            else:
+                self.setDrawable(position, drawable)
+
     def deleteDrawable(self, position: Tuple[int, int]):
-        self.drawables.pop(position, None)
+        if position in self.drawables:
+            del self.drawables[position]
+
+            x, y = position
+            row = self.rows[y]
+
+            del row[bisect_left(row, x)]
+
+            if not row:
+                del self.rows[y]
+                del self.row_keys[bisect_left(self.row_keys, y)]
+
+    def getRows(self):
+        return self.row_keys
+
+    def getRow(self, y: int):
+        return self.rows.get(y, [])
+
+    def getFirstAfter(self, position: Tuple[int, int]):
+        x, y = position
+        row = self.getRow(y)
+        index = bisect_left(row, x)
+
+        if index < len(row):
+            return row[index]
+
+    def getLastBefore(self, position: Tuple[int, int]):
+        x, y = position
+        row = self.getRow(y)
+        index = bisect_right(row, x)
+
+        if index > 0:
+            return row[index - 1]
+
+    def getRunStart(self, position: Tuple[int, int], step: int):
+        x, y = position
+        row = self.getRow(y)
+        index = bisect_left(row, x)
+
+        if index == len(row) or row[index] != x:
+            return None
+
+        while index > 0 and row[index - 1] == row[index] - step:
+            index -= 1
+
+        return row[index]
+
+    def getRunEnd(self, position: Tuple[int, int], step: int):
+        x, y = position
+        row = self.getRow(y)
+        index = bisect_left(row, x)
+
+        if index == len(row) or row[index] != x:
+            return None
+
+        while index < len(row) - 1 and row[index + 1] == row[index] + step:
+            index += 1
+
+        return row[index]
 
-    def updatePositions(self, position: Tuple[int, int]):
-        newDrawables: Dict[Tuple[int, int], T] = {}
+    def getRowDrawables(self, y: int, left: int = None, right: int = None):
+        row = self.getRow(y)
+        start = bisect_left(row, left) if left != None else 0
+        end = bisect_left(row, right) if right != None else len(row)
 
-        for oldPosition in self.drawables.keys():
-            newPosition = tuple(map(sum, zip(oldPosition, position)))
+        for x in row[start:end]:
+            yield x, self.drawables[x, y]
 
-            newDrawables[newPosition] = self.drawables.get(oldPosition)
+    def getDrawablesIn(self, left: int, top: int, right: int, bottom: int):
+        row_keys = self.getRows()
 
-        self.setDrawables(newDrawables)
+        for y in row_keys[bisect_left(row_keys, top):bisect_left(row_keys, bottom)]:
+            for x, drawable in self.getRowDrawables(y, left, right):
+                yield (x, y), drawable
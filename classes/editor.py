@@ -1,10 +1,24 @@
+import copy
+import os
+from bisect import bisect_left, bisect_right
 from collections import deque
-from typing import Deque, List, Tuple, TypeVar, Generic
+from heapq import merge
+from typing import Deque, Dict, List, Optional, Set, Tuple, TypeVar, Generic
 
 import pygame
 
 from classes.canvas import Canvas
 from classes.cursor import Cursor
+from classes.glyph_cache import GlyphCache
+from classes.history import History, LazyHistoryEntry
+from classes.journal import Journal
+from classes.mapped_file import MappedFile
+from classes.packed_canvas import PackedCanvas
+from classes.profiler import profiled
+from classes.search_index import SearchIndex, SearchLine
+from classes.text_canvas import TextCanvas
+from classes.text_layout import TextLayout
+from classes.tile_cache import TileCache
 
 T = TypeVar('T')
 
@@ -18,6 +32,15 @@ class Editor(Generic[T]):
         self.unit_size_y = max(unit_size_y, 1)
         self.grid_size_x = max(grid_size_x, 2)
         self.grid_size_y = max(grid_size_y, 2)
+        self.viewport_x = 0
+        self.viewport_y = 0
+        self.dirty: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        self.redraw = True
+        self.stale = True
+        self.drawn_cursor_position = self.getCursorAbsolutePosition()
+        self.selection_anchor: Optional[Tuple[int, int]] = None
+        self.drawn_selection: Optional[Tuple[int, int, int, int]] = None
+        self.history = History[T]()
 
     def getCursor(self):
         return self.cursor
@@ -25,6 +48,9 @@ class Editor(Generic[T]):
     def getCanvas(self):
         return self.canvas
 
+    def getHistory(self):
+        return self.history
+
     def getUnitSizeX(self):
         return self.unit_size_x
 
@@ -37,6 +63,7 @@ class Editor(Generic[T]):
     def setUnitSizes(self, unit_size_x: int, unit_size_y: int):
         self.unit_size_x = max(unit_size_x, 1)
         self.unit_size_y = max(unit_size_y, 1)
+        self.markAllDirty()
 
     def getGridSizes(self):
         return self.grid_size_x, self.grid_size_y
@@ -44,6 +71,7 @@ class Editor(Generic[T]):
     def setGridSizes(self, grid_size_x: int, grid_size_y: int):
         self.grid_size_x = max(grid_size_x, 2)
         self.grid_size_y = max(grid_size_y, 2)
+        self.markAllDirty()
 
     def getWidth(self):
         return self.unit_size_x * self.grid_size_x
@@ -57,23 +85,114 @@ class Editor(Generic[T]):
     def getLimitY(self):
         return self.unit_size_y * (self.grid_size_y - 1)
 
+    def getViewport(self):
+        return self.viewport_x, self.viewport_y
+
+    def setViewport(self, viewport_x: int, viewport_y: int):
+        self.viewport_x = viewport_x
+        self.viewport_y = viewport_y
+        self.markAllDirty()
+
+    def toScreenPosition(self, position: Tuple[int, int]):
+        return position[0] - self.viewport_x, position[1] - self.viewport_y
+
+    def toAbsolutePosition(self, position: Tuple[int, int]):
+        return position[0] + self.viewport_x, position[1] + self.viewport_y
+
+    def getDrawableSize(self, drawable: T):
+        return self.getUnitSizes()
+
+    def markDirty(self, position: Tuple[int, int], size: Tuple[int, int] = None):
+        size_x, size_y = size or self.getUnitSizes()
+
+        if (dirty_size := self.dirty.get(position)):
+            size_x, size_y = max(size_x, dirty_size[0]), max(
+                size_y, dirty_size[1])
+
+        self.dirty[position] = size_x, size_y
+
+    def markDrawableDirty(self, position: Tuple[int, int]):
+        self.markDirty(position)
+
+        if (drawable := self.canvas.getDrawable(position)):
+            self.markDirty(position, self.getDrawableSize(drawable))
+
+    def markCursorDirty(self):
+        self.markDirty(self.getCursorAbsolutePosition())
+
+    def markAllDirty(self):
+        self.redraw = True
+
+    def markCanvasDirty(self):
+        self.redraw = True
+        self.stale = True
+
+    def popStale(self):
+        stale = self.stale
+        self.stale = False
+
+        return stale
+
+    def popDirty(self):
+        cursor_position = self.getCursorAbsolutePosition()
+
+        if cursor_position != self.drawn_cursor_position:
+            self.markDrawableDirty(self.drawn_cursor_position)
+            self.markDrawableDirty(cursor_position)
+            self.drawn_cursor_position = cursor_position
+
+        if (selection := self.getSelectionRect()) != self.drawn_selection:
+            for rect in (self.drawn_selection, selection):
+                if rect:
+                    self.markDirty(rect[:2], rect[2:])
+
+            self.drawn_selection = selection
+
+        redraw, dirty = self.redraw, self.dirty
+
+        self.redraw = False
+        self.dirty = {}
+
+        return redraw, dirty
+
     def resetCanvas(self):
+        for position, drawable in self.canvas.getDrawables().items():
+            self.history.capture(position, drawable)
+
         self.canvas.setDrawables({})
+        self.markCanvasDirty()
+
+    def scrollBy(self, dx: int, dy: int):
+        if dx or dy:
+            self.setViewport(self.viewport_x + dx, self.viewport_y + dy)
 
     def scrollLeft(self):
-        self.canvas.updatePositions((self.unit_size_x, 0))
+        self.scrollBy(-self.unit_size_x, 0)
 
     def scrollRight(self):
-        self.canvas.updatePositions((-self.unit_size_x, 0))
+        self.scrollBy(self.unit_size_x, 0)
 
     def scrollUp(self):
-        self.canvas.updatePositions((0, self.unit_size_y))
+        self.scrollBy(0, -self.unit_size_y)
 
     def scrollDown(self):
-        self.canvas.updatePositions((0, -self.unit_size_y))
+        self.scrollBy(0, self.unit_size_y)
+
+    def applyDrawables(self, drawables: Dict[Tuple[int, int], Optional[T]]):
+        if len(drawables) > self.grid_size_x * self.grid_size_y:
+            self.canvas.applyDrawables(drawables)
+            self.markCanvasDirty()
 
-    def setCanvasDrawables(self, *drawables: Tuple[Tuple[int, int], T]):
-        self.canvas.setDrawables(dict(drawables))
+            return
+
+        for position, drawable in drawables.items():
+            self.markDrawableDirty(position)
+
+            if drawable is None:
+                self.canvas.deleteDrawable(position)
+            else:
+                self.canvas.setDrawable(position, drawable)
+                self.markDrawableDirty(position)
 
     def setCursorPosition(self, x: int = None, y: int = None):
         if x == None and y == None:
@@ -85,6 +204,28 @@ class Editor(Generic[T]):
         else:
             self.cursor.setPosition((x, y))
 
+    def getCursorAbsolutePosition(self):
+        return self.toAbsolutePosition(self.cursor.getPosition())
+
+    def setCursorAbsolutePosition(self, x: int, y: int):
+        screen_x, screen_y = self.toScreenPosition((x, y))
+        limit_x = self.getLimitX()
+        limit_y = self.getLimitY()
+        dx = min(screen_x, 0) + max(screen_x - limit_x, 0)
+        dy = min(screen_y, 0) + max(screen_y - limit_y, 0)
+
+        self.scrollBy(dx, dy)
+        self.cursor.setPosition(self.toScreenPosition((x, y)))
+
+    def moveCursorBy(self, dx: int, dy: int):
+        x, y = self.getCursorAbsolutePosition()
+
+        self.setCursorAbsolutePosition(
+            x + dx * self.unit_size_x, y + dy * self.unit_size_y)
+
+    def getDrawableUnderCursor(self):
+        return self.canvas.getDrawable(self.getCursorAbsolutePosition())
+
     def moveCursorLeft(self):
         cursor_x = self.cursor.getX()
 
@@ -143,26 +284,202 @@ class Editor(Generic[T]):
         else:
             self.scrollDown()
 
-    def editUnderCursor(self, drawable: T):
-        position = self.cursor.getPosition()
+    def loadRow(self, y: int):
+        pass
+
+    def getRowStart(self, y: int):
+        self.loadRow(y)
+
+        if len(row := self.canvas.getRow(y)):
+            return row[0]
+
+    def getRowEnd(self, y: int):
+        self.loadRow(y)
+
+        if len(row := self.canvas.getRow(y)):
+            return row[-1] + self.unit_size_x
+
+    def getDocumentBounds(self):
+        if not (rows := self.canvas.getRows()):
+            return None
+
+        return rows[0], rows[-1]
+
+    def getLineCount(self):
+        if not (bounds := self.getDocumentBounds()):
+            return 0
+
+        return (bounds[1] - bounds[0]) // self.unit_size_y + 1
 
+    def getLineY(self, line: int):
+        if not (bounds := self.getDocumentBounds()):
+            return None
+
+        return min(bounds[0] + (max(line, 1) - 1) * self.unit_size_y, bounds[1])
+
+    def jumpTo(self, x: Optional[int], y: int):
+        self.setCursorAbsolutePosition(
+            x if x != None else self.getCursorAbsolutePosition()[0], y)
+
+    def jumpToDocumentStart(self):
+        if (bounds := self.getDocumentBounds()):
+            self.jumpTo(self.getRowStart(bounds[0]), bounds[0])
+
+    def jumpToDocumentEnd(self):
+        if (bounds := self.getDocumentBounds()):
+            self.jumpTo(self.getRowEnd(bounds[1]), bounds[1])
+
+    def goToLine(self, line: int):
+        if (y := self.getLineY(line)) != None:
+            self.jumpTo(self.getRowStart(y), y)
+
+    def editAt(self, position: Tuple[int, int], drawable: T):
+        self.history.capture(position, self.canvas.getDrawable(position))
+        self.markDrawableDirty(position)
         self.canvas.setDrawable(position, drawable)
+        self.markDrawableDirty(position)
 
-    def deleteUnderCursor(self):
-        position = self.cursor.getPosition()
+    def editDrawables(self, drawables: Dict[Tuple[int, int], T]):
+        bulk = len(drawables) > self.grid_size_x * self.grid_size_y
+
+        for position in drawables.keys():
+            self.history.capture(position, self.canvas.getDrawable(position))
+
+            if not bulk:
+                self.markDrawableDirty(position)
+
+        self.canvas.updateDrawables(drawables)
+
+        if bulk:
+            self.markCanvasDirty()
+        else:
+            for position in drawables.keys():
+                self.markDrawableDirty(position)
 
+    def deleteAt(self, position: Tuple[int, int]):
+        self.history.capture(position, self.canvas.getDrawable(position))
+        self.markDrawableDirty(position)
         self.canvas.deleteDrawable(position)
 
+    def editUnderCursor(self, drawable: T):
+        self.editAt(self.getCursorAbsolutePosition(), drawable)
+
+    def deleteUnderCursor(self):
+        self.deleteAt(self.getCursorAbsolutePosition())
+
+    def getSelectionAnchor(self):
+        return self.selection_anchor
+
+    def hasSelection(self):
+        return self.selection_anchor != None
+
+    def startSelection(self):
+        if self.selection_anchor == None:
+            self.selection_anchor = self.getCursorAbsolutePosition()
+
+    def clearSelection(self):
+        self.selection_anchor = None
+
+    def getSelectionRect(self):
+        if self.selection_anchor == None:
+            return None
+
+        anchor_x, anchor_y = self.selection_anchor
+        cursor_x, cursor_y = self.getCursorAbsolutePosition()
+        left, top = min(anchor_x, cursor_x), min(anchor_y, cursor_y)
+
+        return left, top, max(anchor_x, cursor_x) - left + self.unit_size_x, max(anchor_y, cursor_y) - top + self.unit_size_y
+
+    def getSelectionDrawables(self):
+        if not (rect := self.getSelectionRect()):
+            return {}
+
+        left, top, width, height = rect
+
+        return dict(self.canvas.getDrawablesIn(left, top, left + width, top + height))
+
+    def changeDrawables(self, drawables: Dict[Tuple[int, int], Optional[T]]):
+        xs, ys = [position[0] for position in drawables.keys()], [
+            position[1] for position in drawables.keys()]
+        current = dict(self.canvas.getDrawablesIn(
+            min(xs, default=0), min(ys, default=0), max(xs, default=0) + 1, max(ys, default=0) + 1))
+
+        for position in drawables.keys():
+            self.history.capture(position, current.get(position))
+
+        self.applyDrawables(drawables)
+
+    def deleteSelection(self):
+        if (drawables := self.getSelectionDrawables()):
+            self.changeDrawables(
+                {position: None for position in drawables.keys()})
+
+    def moveSelection(self, dx: int, dy: int):
+        if not self.hasSelection():
+            return
+
+        offset_x, offset_y = dx * self.unit_size_x, dy * self.unit_size_y
+        drawables = self.getSelectionDrawables()
+        changes: Dict[Tuple[int, int], Optional[T]] = {
+            position: None for position in drawables.keys()}
+
+        for (x, y), drawable in drawables.items():
+            changes[x + offset_x, y + offset_y] = drawable
+
+        self.changeDrawables(changes)
+
+        anchor_x, anchor_y = self.selection_anchor
+        cursor_x, cursor_y = self.getCursorAbsolutePosition()
+
+        self.selection_anchor = anchor_x + offset_x, anchor_y + offset_y
+        self.setCursorAbsolutePosition(cursor_x + offset_x, cursor_y + offset_y)
+
+    def getMapping(self):
+        return None
+
+    def setMapping(self, mapping: object, current: object = None):
+        pass
+
+    @profiled('record')
+    def record(self):
+        self.history.commit(self.getCursorAbsolutePosition(), self.canvas,
+                            self.getMapping() if self.history.hasPendingMapping() else None)
+
+    def undo(self):
+        self.record()
+
+        if (entry := self.history.undo()):
+            self.clearSelection()
+            self.applyDrawables(entry.getBefore())
+
+            if entry.hasMappingChange():
+                self.setMapping(entry.getMappingBefore(), entry.getMappingAfter())
+
+            self.setCursorAbsolutePosition(*entry.getCursorBefore())
+            self.record()
+
+    def redo(self):
+        self.record()
+
+        if (entry := self.history.redo()):
+            self.clearSelection()
+            self.applyDrawables(entry.getAfter())
+
+            if entry.hasMappingChange():
+                self.setMapping(entry.getMappingAfter(), entry.getMappingBefore())
+
+            self.setCursorAbsolutePosition(*entry.getCursorAfter())
+            self.record()
+
 
 class TextEditor(Editor[Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]]):
-    def __init__(self, font: pygame.font.Font, grid_size_x: int = 2, grid_size_y: int = 2):
-        cursor_surface = font.render(
-            '|', False, (255, 255, 255), (0, 0, 0))
-        flash_surface = font.render(' ', False, (255, 255, 255), (0, 0, 0))
+    def __init__(self, font: pygame.font.Font, grid_size_x: int = 2, grid_size_y: int = 2, glyph_cache: GlyphCache = None):
+        glyph_cache = glyph_cache or GlyphCache(font)
+        cursor_surface = glyph_cache.render('|')
+        flash_surface = glyph_cache.render(' ')
 
         cursor = Cursor(cursor_surface, 0, 0, flash_surface)
-        canvas = Canvas[Tuple[str, pygame.Surface,
-                              Tuple[int, ...], Tuple[int, ...]]]({})
+        canvas = TextCanvas(glyph_cache.render)
         tints: Deque[Tuple[int, ...]] = deque([(0, 0, 0), (255, 0, 0), (0, 255, 0), (0, 0, 255),
                                                (255, 255, 0), (255, 0, 255), (0, 255, 255)])
         unit_size_x = cursor_surface.get_width()
@@ -173,50 +490,451 @@ class TextEditor(Editor[Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, .
 
         self.font = font
 
+        self.glyph_cache = glyph_cache
+
+        self.tile_cache = TileCache(glyph_cache)
+        self.tile_cache.fitGridSizes(*self.getGridSizes())
+
+        self.cursor_surface = cursor_surface
+
         self.tints = tints
 
         self.tint = tints[0]
 
-        self.state = -1
+        self.mapped_file: Optional[MappedFile] = None
+        self.mapped_origin = 0, 0
+        self.mapped_unit_sizes = self.getUnitSizes()
+        self.mapped_tint = self.tint
+        self.mapped_rows: Dict[int, int] = {}
+        self.edited_rows: Set[int] = set()
+        self.layout_bounds: Optional[Tuple[int, int]] = None
+
+        self.journal: Optional[Journal] = None
 
-        self.history: List[Tuple[Tuple[int, int],
-                                 Tuple[Tuple[Tuple[int, int], Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]]]]] = []
+        self.search_index = SearchIndex(self)
+        self.search_stale = True
+        self.search_query: Optional[str] = None
+        self.last_search_query = ''
+        self.search_origin = 0, 0
+        self.search_highlights: Set[Tuple[int, int]] = set()
+        self.search_highlights_key = None
+        self.line_query: Optional[str] = None
+
+        self.packed: Optional[PackedCanvas] = None
 
     def getTint(self):
         return self.tint
 
+    def getFont(self):
+        return self.font
+
+    def isPacked(self):
+        return self.packed != None
+
+    def getPacked(self):
+        return self.packed
+
+    def pack(self, history_entries: int = 16, history_changes: int = 10000):
+        if self.packed:
+            return
+
+        self.record()
+        self.history.trim(history_entries, history_changes)
+
+        if self.journal:
+            self.journal.flush()
+
+        self.dropUneditedMappedRows()
+
+        self.packed = self.canvas.pack()
+        self.canvas.setDrawables({})
+        self.search_index.clear()
+        self.search_stale = True
+        self.search_highlights = set()
+        self.search_highlights_key = None
+        self.tile_cache.clear()
+
+    def unpack(self):
+        if not self.packed:
+            return
+
+        self.canvas.unpack(self.packed)
+        self.packed = None
+        self.mapped_rows = {index: count for index, count in self.mapped_rows.items()
+                            if index in self.edited_rows}
+        self.syncMappedRows()
+        self.markCanvasDirty()
+
+    def getTints(self):
+        return self.tints
+
+    def getDrawableSize(self, drawable: Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]):
+        return drawable[2]
+
+    def getGlyphCache(self):
+        return self.glyph_cache
+
+    def getTileCache(self):
+        return self.tile_cache
+
+    def getCursorCharacter(self):
+        return '|' if self.cursor.getSurface() is self.cursor_surface else ' '
+
     def renderCharacter(self, character: str, color: pygame.Color = (255, 255, 255), background: pygame.Color = (0, 0, 0)):
-        return self.font.render(character, False, color, background)
+        return self.glyph_cache.render(character, color, background)
 
-    def getFirstAfterCursor(self):
-        cursor_position = self.cursor.getPosition()
-        positions = self.canvas.getDrawables().keys()
+    def layoutCharacters(self, string: str):
+        characters: List[str] = []
 
-        sorted_x = sorted((position[0] for position in positions if position[1]
-                           == cursor_position[1] and position[0] >= cursor_position[0]), reverse=True)
+        for character in string:
+            if character in '\x00\r':
+                continue
 
-        if len(sorted_x) > 0:
-            return sorted_x.pop()
+            if character == '\t':
+                tab = 4
+                characters.extend('' for _ in range(tab))
+                continue
 
-    def getLastBeforeCursor(self):
-        cursor_position = self.cursor.getPosition()
-        positions = self.canvas.getDrawables().keys()
+            characters.append(character)
+
+        return characters
+
+    def renderLine(self, string: str, unit_sizes: Tuple[int, ...], tint: Tuple[int, ...]):
+        return [(character, self.renderCharacter(character or ' '), unit_sizes, tint)
+                for character in self.layoutCharacters(string)]
+
+    def getMappedFile(self):
+        return self.mapped_file
+
+    def getMappedRowIndex(self, y: int):
+        index, remainder = divmod(
+            y - self.mapped_origin[1], self.mapped_unit_sizes[1])
+
+        if remainder == 0 and 0 <= index < self.mapped_file.getLineCount():
+            return index
+
+    def getMappedRowY(self, index: int):
+        return self.mapped_origin[1] + index * self.mapped_unit_sizes[1]
+
+    def openMappedFile(self, mapped_file: MappedFile, origin: Tuple[int, int] = None, unit_sizes: Tuple[int, ...] = None, tint: Tuple[int, ...] = None):
+        self.record()
+
+        if self.mapped_file:
+            self.dropUneditedMappedRows()
+
+        self.history.captureMapping(self.getMapping())
+        self.detachMapped()
+
+        self.mapped_file = mapped_file
+        self.search_stale = True
+        self.mapped_origin = origin or self.getCursorAbsolutePosition()
+        self.mapped_unit_sizes = unit_sizes or self.getUnitSizes()
+        self.mapped_tint = tint or self.getTint()
+
+        if self.journal:
+            self.journal.map(os.path.abspath(mapped_file.getPath()),
+                             self.mapped_origin, self.mapped_unit_sizes, self.mapped_tint)
+
+        rows = self.canvas.getRows()
+        first_y = self.getMappedRowY(0)
+        last_y = self.getMappedRowY(self.mapped_file.getLineCount() - 1)
+
+        for y in rows[bisect_left(rows, first_y):bisect_left(rows, last_y + 1)]:
+            if (index := self.getMappedRowIndex(y)) != None:
+                self.edited_rows.add(index)
+
+        for index in self.edited_rows:
+            y = self.getMappedRowY(index)
+
+            for x, drawable in self.canvas.getRowDrawables(y):
+                self.history.capture((x, y), drawable)
+
+            self.loadMappedRow(index)
+
+        self.syncMappedRows()
+        self.record()
+        self.markCanvasDirty()
+
+    def closeMapped(self):
+        if self.mapped_file:
+            self.mapped_file.close()
+
+        self.detachMapped()
+
+    def detachMapped(self):
+        self.mapped_file = None
+        self.mapped_rows = {}
+        self.edited_rows = set()
+        self.search_stale = True
+
+    def getMapping(self):
+        if not self.mapped_file:
+            return None
+
+        return self.mapped_file, self.mapped_origin, self.mapped_unit_sizes, self.mapped_tint, \
+            {index: count for index, count in self.mapped_rows.items() if index in self.edited_rows}, \
+            frozenset(self.edited_rows)
+
+    def setMapping(self, mapping: object, current: object = None):
+        if self.mapped_file:
+            if current:
+                self.edited_rows &= current[5]
+
+            self.dropUneditedMappedRows()
+
+        self.detachMapped()
+
+        if mapping:
+            self.mapped_file, self.mapped_origin, self.mapped_unit_sizes, self.mapped_tint, mapped_rows, edited_rows = mapping
+            self.mapped_rows = dict(mapped_rows)
+            self.edited_rows = set(edited_rows)
+            self.syncMappedRows()
+
+        if self.journal:
+            self.journal.compact(self.iterJournalSnapshot())
+
+        self.markCanvasDirty()
+
+    def loadMappedRow(self, index: int):
+        if index in self.mapped_rows:
+            return
+
+        x, y = self.mapped_origin[0], self.getMappedRowY(index)
+        drawables = self.renderLine(self.mapped_file.getLine(
+            index), self.mapped_unit_sizes, self.mapped_tint)
+
+        if drawables:
+            self.markDirty((x, y), (len(drawables) * self.mapped_unit_sizes[0],
+                                    self.mapped_unit_sizes[1]))
+
+        for drawable in drawables:
+            self.canvas.setDrawable((x, y), drawable)
+            x += self.mapped_unit_sizes[0]
+
+        self.mapped_rows[index] = len(drawables)
+
+    def dropMappedRow(self, index: int):
+        x, y = self.mapped_origin[0], self.getMappedRowY(index)
+
+        for _ in range(self.mapped_rows.pop(index)):
+            self.canvas.deleteDrawable((x, y))
+            x += self.mapped_unit_sizes[0]
+
+    def dropUneditedMappedRows(self):
+        for index in [index for index in self.mapped_rows if index not in self.edited_rows]:
+            self.dropMappedRow(index)
+
+    def syncMappedRows(self):
+        if not self.mapped_file:
+            return
+
+        unit_size_y = self.mapped_unit_sizes[1]
+        height = self.getHeight()
+        top = self.viewport_y - self.mapped_origin[1]
+        last_index = self.mapped_file.getLineCount() - 1
+
+        first = max((top - height) // unit_size_y, 0)
+        last = min((top + 2 * height) // unit_size_y, last_index)
+
+        for index in range(first, last + 1):
+            self.loadMappedRow(index)
+
+        keep_first = (top - 3 * height) // unit_size_y
+        keep_last = (top + 4 * height) // unit_size_y
+
+        for index in [index for index in self.mapped_rows
+                      if not keep_first <= index <= keep_last and index not in self.edited_rows]:
+            self.dropMappedRow(index)
+
+    def markMappedRowEdited(self, y: int):
+        if self.mapped_file and (index := self.getMappedRowIndex(y)) != None:
+            self.loadMappedRow(index)
+            self.edited_rows.add(index)
+
+    @profiled('setViewport')
+    def setViewport(self, viewport_x: int, viewport_y: int):
+        super().setViewport(viewport_x, viewport_y)
+        self.syncMappedRows()
+
+    def setUnitSizes(self, unit_size_x: int, unit_size_y: int):
+        super().setUnitSizes(unit_size_x, unit_size_y)
+        self.tile_cache.fitGridSizes(*self.getGridSizes())
+
+    def setGridSizes(self, grid_size_x: int, grid_size_y: int):
+        super().setGridSizes(grid_size_x, grid_size_y)
+        self.tile_cache.fitGridSizes(*self.getGridSizes())
+        self.syncMappedRows()
+
+    def resetCanvas(self):
+        if self.mapped_file:
+            self.dropUneditedMappedRows()
+            self.history.captureMapping(self.getMapping())
+
+        super().resetCanvas()
+        self.detachMapped()
+        self.layout_bounds = None
+
+        if self.journal:
+            self.journal.reset()
+
+    def editAt(self, position: Tuple[int, int], drawable: Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]):
+        self.markMappedRowEdited(position[1])
+        super().editAt(position, drawable)
+
+        if self.journal:
+            self.journal.set(position, drawable)
+
+    def deleteAt(self, position: Tuple[int, int]):
+        self.markMappedRowEdited(position[1])
+        super().deleteAt(position)
+
+        if self.journal:
+            self.journal.delete(position)
 
-        sorted_x = sorted(position[0] for position in positions if position[1]
-                          == cursor_position[1] and position[0] <= cursor_position[0])
+    def editDrawables(self, drawables: Dict[Tuple[int, int], Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]]):
+        if self.mapped_file:
+            for y in {position[1] for position in drawables.keys()}:
+                self.markMappedRowEdited(y)
 
-        if len(sorted_x) > 0:
-            return sorted_x.pop()
+        super().editDrawables(drawables)
+
+        if self.journal:
+            for position, drawable in drawables.items():
+                self.journal.set(position, drawable)
+
+    def changeDrawables(self, drawables: Dict[Tuple[int, int], Optional[Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]]]):
+        if self.mapped_file:
+            for y in {position[1] for position in drawables.keys()}:
+                self.markMappedRowEdited(y)
+
+        super().changeDrawables(drawables)
+
+    def applyDrawables(self, drawables: Dict[Tuple[int, int], Optional[Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]]]):
+        for position in drawables.keys():
+            self.markMappedRowEdited(position[1])
+
+        super().applyDrawables(drawables)
+
+        if self.journal:
+            for position, drawable in drawables.items():
+                if drawable is None:
+                    self.journal.delete(position)
+                else:
+                    self.journal.set(position, drawable)
+
+    def record(self):
+        super().record()
+
+        if self.journal:
+            self.journal.moveCursor(self.getCursorAbsolutePosition())
+
+    def getJournal(self):
+        return self.journal
+
+    def setJournal(self, journal: Optional[Journal]):
+        self.journal = journal
+
+        if journal:
+            journal.compact(self.iterJournalSnapshot())
+
+    def flushJournal(self):
+        if not self.journal:
+            return
+
+        self.journal.moveCursor(self.getCursorAbsolutePosition())
+        self.journal.flush()
+
+        if self.journal.shouldCompact():
+            self.journal.compact(self.iterJournalSnapshot())
+
+    def iterJournalSnapshot(self):
+        if self.mapped_file:
+            yield self.journal.formatMap(os.path.abspath(self.mapped_file.getPath()),
+                                         self.mapped_origin, self.mapped_unit_sizes, self.mapped_tint)
+
+            for index in sorted(self.edited_rows):
+                yield self.journal.formatClearRow(self.getMappedRowY(index))
+
+        for y in self.canvas.getRows():
+            if self.mapped_file and (index := self.getMappedRowIndex(y)) != None and index not in self.edited_rows:
+                continue
+
+            for x, drawable in self.canvas.getRowDrawables(y):
+                yield self.journal.formatSet((x, y), drawable)
+
+        yield self.journal.formatCursor(self.getCursorAbsolutePosition())
+
+    def replayJournal(self, journal: Journal):
+        changes: Dict[Tuple[int, int], Optional[Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]]] = {}
+        cursor_position: Optional[Tuple[int, int]] = None
+
+        for fields in journal.read():
+            try:
+                operation = fields[0]
+
+                if operation == 's':
+                    x, y, point, *rest = map(int, fields[1:])
+                    character = chr(point) if point else ''
+                    changes[x, y] = character, self.renderCharacter(
+                        character or ' '), tuple(rest[:2]), tuple(rest[2:])
+                    continue
+
+                if operation == 'd':
+                    changes[int(fields[1]), int(fields[2])] = None
+                    continue
+
+                if operation == 'c':
+                    cursor_position = int(fields[1]), int(fields[2])
+                    continue
+
+                self.applyDrawables(changes)
+                changes = {}
+
+                if operation == 'r':
+                    self.resetCanvas()
+
+                if operation == 'm':
+                    origin_x, origin_y, unit_x, unit_y, *tint = map(
+                        int, fields[1:8])
+                    self.openMappedFile(MappedFile(fields[8]), (origin_x, origin_y),
+                                        (unit_x, unit_y), tuple(tint))
+
+                if operation == 'l':
+                    origin_x, origin_y, unit_x, unit_y, *tint = map(
+                        int, fields[1:8])
+                    self.fillLayout(journal.readLayout(fields[9], int(fields[8])), (origin_x, origin_y),
+                                    (unit_x, unit_y), tuple(tint))
+
+                if operation == 'e':
+                    y = int(fields[1])
+                    self.markMappedRowEdited(y)
+
+                    for x in list(self.canvas.getRow(y)):
+                        self.canvas.deleteDrawable((x, y))
+            except (ValueError, IndexError, EOFError, OSError):
+                continue
+
+        self.applyDrawables(changes)
+
+        if cursor_position:
+            self.setCursorAbsolutePosition(*cursor_position)
+
+        self.history.clear()
+        self.record()
+        self.markCanvasDirty()
+
+    def getFirstAfterCursor(self):
+        return self.canvas.getFirstAfter(self.getCursorAbsolutePosition())
+
+    def getLastBeforeCursor(self):
+        return self.canvas.getLastBefore(self.getCursorAbsolutePosition())
 
     def snapCursorToLastBeforeCursor(self):
         final_x = self.getLastBeforeCursor()
 
         if final_x != None:
-            while final_x < 0:
-                self.scrollLeft()
-                final_x += self.unit_size_x
-
-            self.cursor.setX(final_x)
+            self.setCursorAbsolutePosition(
+                final_x, self.getCursorAbsolutePosition()[1])
 
             return True
         else:
@@ -226,37 +944,122 @@ class TextEditor(Editor[Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, .
         final_x = self.getFirstAfterCursor()
 
         if final_x != None:
-            while final_x > self.getLimitX():
-                self.scrollRight()
-                final_x -= self.unit_size_x
-
-            self.cursor.setX(final_x)
+            self.setCursorAbsolutePosition(
+                final_x, self.getCursorAbsolutePosition()[1])
 
             return True
         else:
             return False
 
     def carriageReturn(self):
-        scrolled = False
-
-        while self.canvas.getDrawable(self.cursor.getPosition()):
-            scrolled = self.moveCursorBackwards()
+        x, y = self.getCursorAbsolutePosition()
+        start_x = self.canvas.getRunStart((x, y), self.unit_size_x)
 
-        if scrolled:
-            self.scrollRight()
+        if start_x != None:
+            self.setCursorAbsolutePosition(start_x, y)
         else:
-            self.moveCursorForwards()
+            self.setCursorAbsolutePosition(x + self.unit_size_x, y)
 
     def carriageLimit(self):
-        scrolled = False
-
-        while self.canvas.getDrawable(self.cursor.getPosition()):
-            scrolled = self.moveCursorForwards()
+        x, y = self.getCursorAbsolutePosition()
+        end_x = self.canvas.getRunEnd((x, y), self.unit_size_x)
 
-        if scrolled:
-            self.scrollLeft()
+        if end_x != None:
+            self.setCursorAbsolutePosition(end_x, y)
         else:
-            self.moveCursorBackwards()
+            self.setCursorAbsolutePosition(x - self.unit_size_x, y)
+
+    def loadRow(self, y: int):
+        if self.mapped_file and (index := self.getMappedRowIndex(y)) != None:
+            self.loadMappedRow(index)
+
+    def getRowStart(self, y: int):
+        if (x := super().getRowStart(y)) == None and self.mapped_file and self.getMappedRowIndex(y) != None:
+            return self.mapped_origin[0]
+
+        return x
+
+    def getRowEnd(self, y: int):
+        self.loadRow(y)
+
+        if (x := self.canvas.getRowEnd(y)) == None and self.mapped_file and self.getMappedRowIndex(y) != None:
+            return self.mapped_origin[0]
+
+        return x
+
+    def getDocumentBounds(self):
+        bounds = super().getDocumentBounds()
+
+        if not self.mapped_file or not self.mapped_file.getLineCount():
+            return bounds
+
+        top, bottom = self.getMappedRowY(0), self.getMappedRowY(
+            self.mapped_file.getLineCount() - 1)
+
+        if bounds:
+            return min(bounds[0], top), max(bounds[1], bottom)
+
+        return top, bottom
+
+    def getLineY(self, line: int):
+        if self.mapped_file and (count := self.mapped_file.getLineCount()):
+            return self.getMappedRowY(min(max(line, 1), count) - 1)
+
+        return super().getLineY(line)
+
+    def getNextRowY(self, y: int):
+        rows = self.canvas.getRows()
+        candidates: List[int] = []
+
+        if (index := bisect_right(rows, y)) < len(rows):
+            candidates.append(rows[index])
+
+        if self.mapped_file:
+            index = max((y - self.mapped_origin[1]) //
+                        self.mapped_unit_sizes[1] + 1, 0)
+
+            if index < self.mapped_file.getLineCount():
+                candidates.append(self.getMappedRowY(index))
+
+        return min(candidates, default=None)
+
+    def getPreviousRowY(self, y: int):
+        rows = self.canvas.getRows()
+        candidates: List[int] = []
+
+        if (index := bisect_left(rows, y)) > 0:
+            candidates.append(rows[index - 1])
+
+        if self.mapped_file:
+            index = min(-(-(y - self.mapped_origin[1]) // self.mapped_unit_sizes[1]) - 1,
+                        self.mapped_file.getLineCount() - 1)
+
+            if index >= 0:
+                candidates.append(self.getMappedRowY(index))
+
+        return max(candidates, default=None)
+
+    def jumpWordForwards(self):
+        x, y = self.getCursorAbsolutePosition()
+
+        self.loadRow(y)
+
+        if (target := self.canvas.getNextWord((x, y))) != None:
+            self.jumpTo(target, y)
+        elif (end := self.canvas.getRowEnd(y)) != None and x < end:
+            self.jumpTo(end, y)
+        elif (next_y := self.getNextRowY(y)) != None:
+            self.jumpTo(self.getRowStart(next_y), next_y)
+
+    def jumpWordBackwards(self):
+        x, y = self.getCursorAbsolutePosition()
+
+        self.loadRow(y)
+
+        if (target := self.canvas.getPreviousWord((x, y))) != None:
+            self.jumpTo(target, y)
+        elif (previous_y := self.getPreviousRowY(y)) != None:
+            self.jumpTo(self.getRowEnd(previous_y), previous_y)
 
     def newLine(self):
         if self.snapCursorToLastBeforeCursor():
@@ -265,96 +1068,437 @@ class TextEditor(Editor[Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, .
         self.moveCursorDownwards()
 
     def fillString(self, string: str):
-        for character in string:
-            if character in '\x00\r':
-                continue
+        unit_sizes = self.getUnitSizes()
+        tint = self.getTint()
+        x, y = self.getCursorAbsolutePosition()
+        start_x = x
+        drawables: Dict[Tuple[int, int], Tuple[str, pygame.Surface,
+                                               Tuple[int, ...], Tuple[int, ...]]] = {}
+
+        for line_index, line in enumerate(string.split('\n')):
+            if line_index > 0:
+                if x > start_x:
+                    run_x = self.canvas.getRunStart(
+                        (start_x - self.unit_size_x, y), self.unit_size_x)
+                    x = run_x if run_x != None else start_x
+                elif (last_x := self.canvas.getLastBefore((x, y))) != None:
+                    x = self.canvas.getRunStart((last_x, y), self.unit_size_x)
+
+                y += self.unit_size_y
+                start_x = x
+
+            for drawable in self.renderLine(line, unit_sizes, tint):
+                drawables[x, y] = drawable
+                x += self.unit_size_x
+
+        self.editDrawables(drawables)
+        self.setCursorAbsolutePosition(x, y)
+
+    def getLayoutChanges(self, layout: TextLayout, starts: List[int], top: int, unit_sizes: Tuple[int, ...], tint: Tuple[int, ...], overwritten: Dict[Tuple[int, int], Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]]):
+        points = layout.getPoints()
+        characters: Dict[int, Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]] = {}
+        changes: Dict[Tuple[int, int], Tuple[Optional[Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]],
+                                             Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]]] = {}
+        offset = 0
+        y = top
+
+        for start, length in zip(starts, layout.getLengths()):
+            for index in range(length):
+                point = points[offset + index]
+
+                if (drawable := characters.get(point)) == None:
+                    character = chr(point) if point else ''
+                    drawable = characters[point] = character, self.renderCharacter(
+                        character or ' '), unit_sizes, tint
 
-            if character == '\t':
-                tab = 4
-                for _ in range(tab):
-                    self.editUnderCursor(('', self.renderCharacter(
-                        ' '), self.getUnitSizes(), self.getTint()))
-                    self.moveCursorForwards()
-                continue
+                position = start + index * unit_sizes[0], y
+                changes[position] = overwritten.get(position), drawable
 
-            if character == '\n':
-                self.newLine()
-                continue
+            offset += length
+            y += unit_sizes[1]
 
-            self.editUnderCursor((character, self.renderCharacter(
-                character), self.getUnitSizes(), self.getTint()))
-            self.moveCursorForwards()
+        return changes
 
-    def getLine(self, cut: bool = False):
-        line = ''
+    def fillLayout(self, layout: TextLayout, origin: Tuple[int, int] = None, unit_sizes: Tuple[int, ...] = None, tint: Tuple[int, ...] = None):
+        unit_sizes = tuple(unit_sizes or self.getUnitSizes())
+        tint = tuple(tint or self.getTint())
+        unit_x, unit_y = unit_sizes[:2]
+        cursor_before = self.getCursorAbsolutePosition()
+        x, y = origin = origin or cursor_before
+        start_x = x
+        starts: List[int] = []
+        overwritten: Dict[Tuple[int, int], Tuple[str, pygame.Surface,
+                                                 Tuple[int, ...], Tuple[int, ...]]] = {}
+
+        self.record()
+
+        for line_index, length in enumerate(layout.getLengths()):
+            if line_index > 0:
+                if x > start_x:
+                    run_x = self.canvas.getRunStart(
+                        (start_x - unit_x, y), unit_x)
+                    x = run_x if run_x != None else start_x
+                elif (last_x := self.canvas.getLastBefore((x, y))) != None:
+                    x = self.canvas.getRunStart((last_x, y), unit_x)
+
+                y += unit_y
+                start_x = x
+
+            starts.append(x)
+            x += length * unit_x
+
+        for start, length, row_y in zip(starts, layout.getLengths(), range(origin[1], y + 1, unit_y)):
+            if length:
+                self.markMappedRowEdited(row_y)
+                overwritten.update(((cell_x, row_y), drawable) for cell_x, drawable in
+                                   self.canvas.getRowDrawables(row_y, start, start + length * unit_x))
+
+        self.canvas.insertLines(starts, origin[1], unit_y, unit_sizes, tint,
+                                layout.getLengths(), layout.getPoints())
+
+        if layout.getLineCount():
+            self.extendLayoutBounds(origin[1], y)
 
+        if layout.getCount():
+            self.history.push(LazyHistoryEntry(cursor_before, (x, y), layout.getCount(),
+                                               lambda: self.getLayoutChanges(layout, starts, origin[1], unit_sizes, tint, overwritten)))
+
+        if self.journal:
+            self.journal.layout(layout, origin, unit_sizes, tint)
+
+        self.setCursorAbsolutePosition(x, y)
+        self.record()
+        self.markCanvasDirty()
+
+    def loadMappedRowsIn(self, top: int, bottom: int):
+        if not self.mapped_file:
+            return
+
+        unit_size_y = self.mapped_unit_sizes[1]
+        first = max(-(-(top - self.mapped_origin[1]) // unit_size_y), 0)
+        last = min((bottom - 1 - self.mapped_origin[1]) // unit_size_y,
+                   self.mapped_file.getLineCount() - 1)
+
+        for index in range(first, last + 1):
+            self.loadMappedRow(index)
+
+    def getSelectionDrawables(self):
+        if (rect := self.getSelectionRect()):
+            self.loadMappedRowsIn(rect[1], rect[1] + rect[3])
+
+        return super().getSelectionDrawables()
+
+    def getSelectionText(self):
+        if not (rect := self.getSelectionRect()):
+            return ''
+
+        left, top, width, height = rect
+        lines: List[str] = []
+
+        self.loadMappedRowsIn(top, top + height)
+
+        for y in range(top, top + height, self.unit_size_y):
+            characters = [' '] * (width // self.unit_size_x)
+
+            for x, drawable in self.canvas.getRowDrawables(y, left, left + width):
+                characters[(x - left) // self.unit_size_x] = drawable[0] or ' '
+
+            lines.append(''.join(characters).rstrip())
+
+        return '\n'.join(lines)
+
+    def getLine(self, cut: bool = False):
         self.snapCursorToLastBeforeCursor()
         self.carriageReturn()
 
-        while (drawable := self.canvas.getDrawable(self.cursor.getPosition())):
-            line += drawable[0]
+        start_x, y = self.getCursorAbsolutePosition()
+        end_x = self.canvas.getRunEnd((start_x, y), self.unit_size_x)
+
+        if end_x == None:
+            return ''
+
+        positions = [(x, y) for x in range(
+            start_x, end_x + self.unit_size_x, self.unit_size_x)]
 
-            self.moveCursorForwards()
+        line = ''.join(self.canvas.getDrawable(position)[0]
+                       for position in positions)
 
         if cut:
-            for _ in line:
-                self.moveCursorBackwards()
-                self.deleteUnderCursor()
+            for position in positions:
+                self.deleteAt(position)
+        else:
+            self.setCursorAbsolutePosition(end_x + self.unit_size_x, y)
 
         return line
 
-    def getContent(self):
-        content = ''
-        positions = self.canvas.getDrawables().keys()
+    def isMappedRowUnloaded(self, y: int):
+        return bool(self.mapped_file) and (index := self.getMappedRowIndex(y)) != None and index not in self.mapped_rows
+
+    def iterRowCells(self, y: int):
+        if self.isMappedRowUnloaded(y):
+            x = self.mapped_origin[0]
+            width = self.mapped_unit_sizes[0]
+
+            for character in self.layoutCharacters(self.mapped_file.getLine(self.getMappedRowIndex(y))):
+                yield x, character, width
+                x += width
+        else:
+            for cell in self.canvas.getRowCells(y):
+                yield cell
+
+    def getRowText(self, y: int, origin_x: int = None):
+        text: List[str] = []
+        next_x = origin_x
+
+        if self.isMappedRowUnloaded(y):
+            line = self.mapped_file.getLine(self.getMappedRowIndex(y))
+
+            if next_x != None and self.mapped_origin[0] > next_x:
+                text.append(
+                    ' ' * ((self.mapped_origin[0] - next_x) // self.unit_size_x))
+
+            text.append(line.replace('\x00', '').replace(
+                '\r', '').replace('\t', ' ' * 4))
+
+            return ''.join(text)
+
+        for x, character, width in self.iterRowCells(y):
+            if next_x != None and x > next_x:
+                text.append(' ' * ((x - next_x) // self.unit_size_x))
+
+            text.append(character or ' ')
+            next_x = x + width
+
+        return ''.join(text)
+
+    def extendLayoutBounds(self, top: int, bottom: int):
+        if self.layout_bounds:
+            top, bottom = min(top, self.layout_bounds[0]), max(bottom, self.layout_bounds[1])
+
+        self.layout_bounds = top, bottom
+
+    def getContentBoundRows(self):
+        bounds = list(self.layout_bounds or ())
+
+        if self.mapped_file:
+            bounds.extend((self.getMappedRowY(0), self.getMappedRowY(self.mapped_file.getLineCount() - 1)))
+
+        if not bounds:
+            return []
+
+        return [y for y in sorted({min(bounds), max(bounds)})
+                if not self.canvas.getRow(y) and not self.isMappedRowUnloaded(y)]
+
+    def getContentRows(self):
+        rows = merge(self.canvas.getRows(), self.getContentBoundRows())
+
+        if not self.mapped_file:
+            return rows
+
+        unloaded_rows = (self.getMappedRowY(index) for index in range(
+            self.mapped_file.getLineCount()) if index not in self.mapped_rows)
+
+        return merge(rows, unloaded_rows)
+
+    def getContentRowCount(self):
+        count = len(self.canvas.getRows()) + len(self.getContentBoundRows())
+
+        if not self.mapped_file:
+            return count
+
+        return count + self.mapped_file.getLineCount() - len(self.mapped_rows)
+
+    def getContentOriginX(self):
+        origins = [self.canvas.getRow(y)[0] for y in self.canvas.getRows()]
 
-        sorted_yx = sorted(((position[1], position[0])
-                            for position in positions))
+        if self.mapped_file and len(self.mapped_rows) < self.mapped_file.getLineCount():
+            origins.append(self.mapped_origin[0])
 
-        last_y = -1
+        return min(origins, default=0)
 
-        for y, x in sorted_yx:
-            if -1 != last_y != y:
-                content += '\n' * ((y - last_y) // self.unit_size_y)
+    def iterContent(self):
+        origin_x = self.getContentOriginX()
+        last_y = None
 
-            drawable = self.canvas.getDrawable((x, y))
+        for y in self.getContentRows():
+            text = self.getRowText(y, origin_x)
 
-            if drawable:
-                content += drawable[0]
-                last_y = y
+            if last_y != None:
+                text = '\n' * ((y - last_y) // self.unit_size_y) + text
 
-        return content
+            yield text
+
+            last_y = y
+
+    def getContent(self):
+        return ''.join(self.iterContent())
+
+    def getSnapshot(self):
+        snapshot = copy.copy(self)
+        snapshot.canvas = self.canvas.copy()
+        snapshot.mapped_file = self.mapped_file.share() if self.mapped_file else None
+        snapshot.mapped_rows = dict(self.mapped_rows)
+        snapshot.edited_rows = set(self.edited_rows)
+
+        return snapshot
 
     def cursorFlash(self):
         self.cursor.updateSurface()
+        self.markCursorDirty()
 
     def updateTint(self):
         self.tints.rotate()
         self.tint = self.tints[0]
+        self.markCursorDirty()
 
-    def record(self):
-        new_state = tuple(self.cursor.getPosition()), tuple(
-            self.canvas.getDrawables().items())
+    def getSearchIndex(self):
+        return self.search_index
 
-        if len(self.history) == 0 or self.history[self.state] != new_state:
-            self.state += 1
+    def getSearchLine(self, y: int):
+        if self.isMappedRowUnloaded(y):
+            return self.getMappedSearchLine(self.getMappedRowIndex(y))
 
-            while self.state < len(self.history):
-                self.history.pop()
+        return self.getCanvasSearchLine(y)
 
-            self.history.append(new_state)
+    def getCanvasSearchLine(self, y: int):
+        if (uniform := self.canvas.getUniformRowText(y)):
+            text, x, width = uniform
 
-    def load(self):
-        cursor_pos, drawables = self.history[self.state]
+            return SearchLine(text, [0], [x], [width])
 
-        self.setCursorPosition(*cursor_pos)
-        self.setCanvasDrawables(*drawables)
+        return SearchLine.fromCells(self.canvas.getRowCells(y))
 
-    def undo(self):
-        if len(self.history) > self.state > 0:
-            self.state -= 1
-            self.load()
+    def getMappedSearchLine(self, index: int):
+        return SearchLine(self.layoutSearchText(self.mapped_file.getLine(index)),
+                          [0], [self.mapped_origin[0]], [self.mapped_unit_sizes[0]])
 
-    def redo(self):
-        if len(self.history) > self.state + 1 > 0:
-            self.state += 1
-            self.load()
+    def layoutSearchText(self, text: str):
+        return text.replace('\x00', '').replace('\r', '').replace('\t', ' ' * 4)
+
+    def getSearchLines(self, top: int, bottom: int):
+        lines: List[Tuple[int, SearchLine]] = []
+        rows = self.canvas.getRows()
+
+        for y in rows[bisect_left(rows, top):bisect_left(rows, bottom)]:
+            lines.append((y, self.getCanvasSearchLine(y)))
+
+        if self.mapped_file:
+            origin_y, unit_size_y = self.mapped_origin[1], self.mapped_unit_sizes[1]
+            start = max(-(-(top - origin_y) // unit_size_y), 0)
+            end = min(-(-(bottom - origin_y) // unit_size_y),
+                      self.mapped_file.getLineCount())
+            starts, xs, steps = [0], [self.mapped_origin[0]], [self.mapped_unit_sizes[0]]
+
+            if start < end:
+                for index, text in enumerate(self.mapped_file.getLines(start, end), start):
+                    if index not in self.mapped_rows:
+                        lines.append((self.getMappedRowY(index), SearchLine(
+                            self.layoutSearchText(text), starts, xs, steps)))
+
+            lines.sort(key=lambda line: line[0])
+
+        return lines
+
+    def syncSearchIndex(self):
+        changed_all, changed_rows = self.canvas.popChangedRows()
+
+        if changed_all or self.search_stale:
+            self.search_index.clear()
+            self.search_stale = False
+        else:
+            for y in changed_rows:
+                self.search_index.invalidate(y)
+
+        return self.search_index
+
+    def isSearchIndexWarm(self):
+        return not self.search_stale and not self.canvas.hasChangedRows() and self.search_index.isWarm()
+
+    def warmSearchIndex(self, count: int = 1):
+        return self.syncSearchIndex().warmStep(count)
+
+    def isSearching(self):
+        return self.search_query != None
+
+    def getSearchQuery(self):
+        return self.search_query
+
+    def openSearch(self):
+        self.line_query = None
+        self.search_query = ''
+        self.search_origin = self.getCursorAbsolutePosition()
+        self.markAllDirty()
+
+    def closeSearch(self):
+        self.search_query = None
+        self.markAllDirty()
+
+    def setSearchQuery(self, query: str):
+        self.search_query = query
+        self.last_search_query = query or self.last_search_query
+
+        if (position := self.syncSearchIndex().find(query, self.search_origin, inclusive=True)):
+            self.setCursorAbsolutePosition(*position)
+
+        self.markAllDirty()
+
+    def isGoingToLine(self):
+        return self.line_query != None
+
+    def getLineQuery(self):
+        return self.line_query
+
+    def openLinePrompt(self):
+        self.search_query = None
+        self.line_query = ''
+        self.markAllDirty()
+
+    def closeLinePrompt(self):
+        self.line_query = None
+        self.markAllDirty()
+
+    def setLineQuery(self, query: str):
+        self.line_query = ''.join(
+            character for character in query if character.isdigit())
+        self.markAllDirty()
+
+    def submitLinePrompt(self):
+        if self.line_query:
+            self.goToLine(int(self.line_query))
+
+        self.closeLinePrompt()
+
+    def findNext(self, backwards: bool = False):
+        if not (query := self.search_query or self.last_search_query):
+            return False
+
+        if (position := self.syncSearchIndex().find(query, self.getCursorAbsolutePosition(), backwards)):
+            self.setCursorAbsolutePosition(*position)
+            self.search_origin = position
+            self.markAllDirty()
+
+        return bool(position)
+
+    def getSearchHighlights(self):
+        if not self.search_query:
+            return set()
+
+        search_index = self.syncSearchIndex()
+        top = self.viewport_y - self.unit_size_y + 1
+        bottom = self.viewport_y + self.getHeight()
+        key = self.search_query, top, bottom, search_index.getVersion()
+
+        if key != self.search_highlights_key:
+            highlights: Set[Tuple[int, int]] = set()
+
+            for line, y, index in search_index.findIn(self.search_query, top, bottom):
+                for offset in range(index, index + len(self.search_query)):
+                    highlights.add((line.getX(offset), y))
+
+            if self.search_highlights_key and self.search_highlights_key[:3] == key[:3] and highlights != self.search_highlights:
+                self.markAllDirty()
+
+            self.search_highlights = highlights
+            self.search_highlights_key = key
+
+        return self.search_highlights
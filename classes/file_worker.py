@@ -0,0 +1,149 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Optional
+
+import pygame
+
+from classes.editor import TextEditor
+from classes.mapped_file import MappedFile
+from classes.text_layout import TextLayout
+from constants import FILEDONE, FILEPROGRESS, LARGE_FILE_SIZE
+from utils.file import iterProgress, writeChunked
+
+
+def loadFile(path: str, progress: Callable[[float], None] = None):
+    if os.path.getsize(path) >= LARGE_FILE_SIZE:
+        return MappedFile(path, progress=progress)
+    else:
+        return TextLayout(path, progress=progress)
+
+
+def storeFile(text_editor: TextEditor, path: str, progress: Callable[[float], None] = None):
+    temporary_path = path + '.tmp'
+
+    try:
+        with open(temporary_path, 'w') as file:
+            writeChunked(file, iterProgress(text_editor.iterContent(),
+                                            text_editor.getContentRowCount(), progress))
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def storeSnapshot(snapshot: TextEditor, path: str, progress: Callable[[float], None] = None):
+    try:
+        storeFile(snapshot, path, progress)
+    finally:
+        snapshot.closeMapped()
+
+
+class FileTask(object):
+    def __init__(self, mode: str, path: str, text_editor: TextEditor = None):
+        self.mode = mode
+        self.path = path
+        self.text_editor = text_editor
+        self.progress = 0.0
+        self.result = None
+        self.error: Optional[Exception] = None
+
+    def getMode(self):
+        return self.mode
+
+    def getPath(self):
+        return self.path
+
+    def getTextEditor(self):
+        return self.text_editor
+
+    def getProgress(self):
+        return self.progress
+
+    def setProgress(self, progress: float):
+        self.progress = progress
+
+    def getResult(self):
+        return self.result
+
+    def setResult(self, result):
+        self.result = result
+
+    def getError(self):
+        return self.error
+
+    def setError(self, error: Exception):
+        self.error = error
+
+
+class FileWorker(object):
+    def __init__(self, step: float = 0.01):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.tasks: Deque[FileTask] = deque()
+        self.step = step
+        self.changed = False
+
+    def isBusy(self):
+        return bool(self.tasks)
+
+    def getTask(self):
+        return self.tasks[0] if self.tasks else None
+
+    def getProgress(self):
+        if self.tasks:
+            return self.tasks[0].getProgress()
+
+    def popChanged(self):
+        changed = self.changed
+        self.changed = False
+
+        return changed
+
+    def report(self, task: FileTask, progress: float):
+        if progress - task.getProgress() >= self.step or progress >= 1:
+            task.setProgress(progress)
+            self.changed = True
+            self.post(pygame.event.Event(FILEPROGRESS, task=task))
+
+    def run(self, task: FileTask, function: Callable[[], object]):
+        try:
+            task.setResult(function())
+        except Exception as error:
+            task.setError(error)
+
+        self.post(pygame.event.Event(FILEDONE, task=task))
+
+    def post(self, event: pygame.event.Event):
+        if pygame.display.get_init():
+            pygame.event.post(event)
+
+    def submit(self, task: FileTask, function: Callable[[], object]):
+        self.tasks.append(task)
+        self.changed = True
+        self.executor.submit(self.run, task, function)
+
+    def open(self, path: str, text_editor: TextEditor = None):
+        task = FileTask('open', path, text_editor)
+
+        self.submit(task, lambda: loadFile(path, lambda progress: self.report(task, progress)))
+
+        return task
+
+    def save(self, text_editor: TextEditor, path: str):
+        task = FileTask('save', path, text_editor)
+        snapshot = text_editor.getSnapshot()
+
+        self.submit(task, lambda: storeSnapshot(snapshot, path, lambda progress: self.report(task, progress)))
+
+        return task
+
+    def finish(self, task: FileTask):
+        if task in self.tasks:
+            self.tasks.remove(task)
+            self.changed = True
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,134 @@
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Iterable, Tuple
+
+import pygame
+
+from utils.surface import getScaled, getTinted
+
+
+class GlyphCache(object):
+    def __init__(self, font: pygame.font.Font, font_path: str = None, font_size: int = None, capacity: int = 4096):
+        self.font = font
+        self.font_path = font_path
+        self.font_size = font_size
+        self.base_sizes = font.size(' ')
+        self.fonts: Dict[Tuple[int, ...], pygame.font.Font] = {}
+        self.capacity = max(capacity, 1)
+        self.renders: Dict[Tuple[str, Tuple[int, ...],
+                                 Tuple[int, ...]], pygame.Surface] = {}
+        self.level_renders: Dict[Tuple[str,
+                                       Tuple[int, ...]], pygame.Surface] = {}
+        self.glyphs: 'OrderedDict[Tuple[str, Tuple[int, ...], Tuple[int, ...]], pygame.Surface]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.allocations = 0
+        self.warm_queue: Deque[Tuple[str, Tuple[int, ...], Tuple[int, ...]]] = deque()
+
+    def getFont(self):
+        return self.font
+
+    def getLevelFont(self, size: Tuple[int, ...]):
+        if not self.font_path or not self.font_size or tuple(size) == self.base_sizes:
+            return self.font
+
+        if (font := self.fonts.get(size)) == None:
+            point_size = max(
+                round(self.font_size * size[1] / self.base_sizes[1]), 1)
+            font = self.fonts[size] = pygame.font.Font(
+                self.font_path, point_size)
+
+        return font
+
+    def getCapacity(self):
+        return self.capacity
+
+    def setCapacity(self, capacity: int):
+        self.capacity = max(capacity, 1)
+
+        while len(self.glyphs) > self.capacity:
+            self.glyphs.popitem(last=False)
+
+    def getHits(self):
+        return self.hits
+
+    def getMisses(self):
+        return self.misses
+
+    def getSize(self):
+        return len(self.glyphs)
+
+    def getAllocations(self):
+        return self.allocations
+
+    def render(self, character: str, color: Tuple[int, ...] = (255, 255, 255), background: Tuple[int, ...] = (0, 0, 0)):
+        key = character, tuple(color), tuple(background)
+        surface = self.renders.get(key)
+
+        if surface is None:
+            surface = self.font.render(
+                character or ' ', False, color, background)
+            self.renders[key] = surface
+            self.allocations += 1
+
+        return surface
+
+    def renderLevel(self, character: str, size: Tuple[int, ...]):
+        key = character, size
+        surface = self.level_renders.get(key)
+
+        if surface is None:
+            surface = self.getLevelFont(size).render(
+                character or ' ', False, (255, 255, 255), (0, 0, 0))
+            self.level_renders[key] = surface
+            self.allocations += 1
+
+        return surface
+
+    def getGlyph(self, character: str, size: Tuple[int, ...], tint: Tuple[int, ...]):
+        key = character, size, tint
+        glyph = self.glyphs.get(key)
+
+        if glyph is not None:
+            self.hits += 1
+            self.glyphs.move_to_end(key)
+            return glyph
+
+        self.misses += 1
+        self.allocations += 1
+
+        glyph = getTinted(
+            getScaled(self.renderLevel(character, size), size), tint)
+
+        self.glyphs[key] = glyph
+
+        if len(self.glyphs) > self.capacity:
+            self.glyphs.popitem(last=False)
+
+        return glyph
+
+    def queueWarm(self, characters: Iterable[str], size: Tuple[int, ...], tint: Tuple[int, ...]):
+        self.warm_queue.extend((character, tuple(size), tuple(tint))
+                               for character in characters)
+
+    def getWarmCount(self):
+        return len(self.warm_queue)
+
+    def warmStep(self, count: int = 16):
+        while self.warm_queue and count > 0:
+            key = self.warm_queue.popleft()
+            character, size, tint = key
+
+            self.render(character)
+
+            if key not in self.glyphs and len(self.glyphs) < self.capacity:
+                self.glyphs[key] = getTinted(
+                    getScaled(self.renderLevel(character, size), size), tint)
+                self.allocations += 1
+                count -= 1
+
+        return bool(self.warm_queue)
+
+    def clear(self):
+        self.glyphs.clear()
+        self.hits = 0
+        self.misses = 0
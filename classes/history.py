@@ -0,0 +1,200 @@
+import sys
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple, TypeVar, Generic
+
+from classes.canvas import Canvas
+
+T = TypeVar('T')
+
+
+class HistoryEntry(Generic[T]):
+    def __init__(self, cursor_before: Tuple[int, int], cursor_after: Tuple[int, int], changes: Dict[Tuple[int, int], Tuple[Optional[T], Optional[T]]], mapping_before: object = None, mapping_after: object = None):
+        self.cursor_before = cursor_before
+        self.cursor_after = cursor_after
+        self.changes = changes
+        self.mapping_before = mapping_before
+        self.mapping_after = mapping_after
+
+    def getCursorBefore(self):
+        return self.cursor_before
+
+    def getCursorAfter(self):
+        return self.cursor_after
+
+    def getChanges(self):
+        return self.changes
+
+    def getChangeCount(self):
+        return len(self.changes)
+
+    def getMappingBefore(self):
+        return self.mapping_before
+
+    def getMappingAfter(self):
+        return self.mapping_after
+
+    def hasMappingChange(self):
+        return self.mapping_before != self.mapping_after
+
+    def getBefore(self):
+        return {position: change[0] for position, change in self.getChanges().items()}
+
+    def getAfter(self):
+        return {position: change[1] for position, change in self.getChanges().items()}
+
+    def isTyping(self):
+        return not self.hasMappingChange() and all(change[1] != None for change in self.getChanges().values())
+
+    def merge(self, entry: 'HistoryEntry[T]'):
+        for position, (old, new) in entry.getChanges().items():
+            if position in self.changes:
+                self.changes[position] = self.changes[position][0], new
+            else:
+                self.changes[position] = old, new
+
+        self.cursor_after = entry.getCursorAfter()
+
+
+class LazyHistoryEntry(HistoryEntry[T]):
+    def __init__(self, cursor_before: Tuple[int, int], cursor_after: Tuple[int, int], count: int, load: Callable[[], Dict[Tuple[int, int], Tuple[Optional[T], Optional[T]]]]):
+        super().__init__(cursor_before, cursor_after, None)
+        self.count = count
+        self.load = load
+
+    def getChanges(self):
+        if self.changes == None:
+            self.changes = self.load()
+            self.load = None
+
+        return self.changes
+
+    def getChangeCount(self):
+        return self.count if self.changes == None else len(self.changes)
+
+
+class History(Generic[T]):
+    def __init__(self, max_entries: int = 1000, max_changes: int = 1000000):
+        self.max_entries = max(max_entries, 1)
+        self.max_changes = max(max_changes, 1)
+        self.entries: Deque[HistoryEntry[T]] = deque()
+        self.state = 0
+        self.changes = 0
+        self.merging = False
+        self.pending: Dict[Tuple[int, int], Optional[T]] = {}
+        self.pending_cursor: Tuple[int, int] = None
+        self.pending_mapping: object = None
+        self.mapping_captured = False
+
+    def getMaxEntries(self):
+        return self.max_entries
+
+    def getMaxChanges(self):
+        return self.max_changes
+
+    def setLimits(self, max_entries: int, max_changes: int):
+        self.max_entries = max(max_entries, 1)
+        self.max_changes = max(max_changes, 1)
+        self.evict()
+
+    def getEntries(self):
+        return self.entries
+
+    def getState(self):
+        return self.state
+
+    def getChangeCount(self):
+        return self.changes
+
+    def getMemoryEstimate(self):
+        change_size = sys.getsizeof((None, None)) + \
+            2 * sys.getsizeof((None, None, None, None))
+
+        return sum(sys.getsizeof(entry.changes) for entry in self.entries if entry.changes != None) + self.changes * change_size
+
+    def capture(self, position: Tuple[int, int], drawable: Optional[T]):
+        if position not in self.pending:
+            self.pending[position] = drawable
+
+    def captureMapping(self, mapping: object):
+        if not self.mapping_captured:
+            self.pending_mapping = mapping
+            self.mapping_captured = True
+
+    def hasPendingMapping(self):
+        return self.mapping_captured
+
+    def commit(self, cursor_position: Tuple[int, int], canvas: Canvas[T], mapping: object = None):
+        changes: Dict[Tuple[int, int], Tuple[Optional[T], Optional[T]]] = {}
+
+        for position, old in self.pending.items():
+            new = canvas.getDrawable(position)
+
+            if old != new:
+                changes[position] = old, new
+
+        remapped = self.mapping_captured and self.pending_mapping != mapping
+
+        if changes or remapped:
+            self.push(HistoryEntry[T](self.pending_cursor or cursor_position, cursor_position, changes,
+                                      self.pending_mapping if remapped else None, mapping if remapped else None))
+        elif self.pending_cursor != cursor_position:
+            self.merging = False
+
+        self.pending = {}
+        self.pending_cursor = cursor_position
+        self.pending_mapping = None
+        self.mapping_captured = False
+
+    def push(self, entry: HistoryEntry[T]):
+        while len(self.entries) > self.state:
+            self.changes -= self.entries.pop().getChangeCount()
+
+        typing = entry.getChangeCount() == 1 and entry.isTyping()
+        last = self.entries[-1] if self.entries else None
+
+        if typing and self.merging and last and last.getCursorAfter() == entry.getCursorBefore():
+            self.changes -= last.getChangeCount()
+            last.merge(entry)
+            self.changes += last.getChangeCount()
+        else:
+            self.entries.append(entry)
+            self.changes += entry.getChangeCount()
+            self.state += 1
+
+        self.merging = typing
+        self.evict()
+
+    def evict(self):
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or self.changes > self.max_changes):
+            self.changes -= self.entries.popleft().getChangeCount()
+            self.state = max(self.state - 1, 0)
+
+    def trim(self, max_entries: int, max_changes: int):
+        while self.entries and (len(self.entries) > max(max_entries, 0) or self.changes > max(max_changes, 0)):
+            self.changes -= self.entries.popleft().getChangeCount()
+            self.state = max(self.state - 1, 0)
+
+        self.merging = False
+
+    def undo(self):
+        self.merging = False
+
+        if self.state > 0:
+            self.state -= 1
+            return self.entries[self.state]
+
+    def redo(self):
+        self.merging = False
+
+        if self.state < len(self.entries):
+            self.state += 1
+            return self.entries[self.state - 1]
+
+    def clear(self):
+        self.entries.clear()
+        self.state = 0
+        self.changes = 0
+        self.merging = False
+        self.pending = {}
+        self.pending_mapping = None
+        self.mapping_captured = False
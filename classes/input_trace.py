@@ -0,0 +1,87 @@
+import gzip
+import json
+import time
+import zlib
+from typing import Iterable, List, Set, Tuple
+
+import pygame
+
+from utils.clipboard import getText
+
+
+def isSerializable(value: object):
+    if isinstance(value, (bool, int, float, str)):
+        return True
+
+    return isinstance(value, (tuple, list)) and all(isinstance(item, (int, float)) for item in value)
+
+
+class InputRecorder(object):
+    def __init__(self, path: str, skipped_types: Iterable[int] = ()):
+        self.path = path
+        self.skipped_types: Set[int] = set(skipped_types)
+        self.file = gzip.open(path, 'wt', encoding='utf-8')
+        self.started = time.perf_counter()
+        self.count = 0
+
+    def getPath(self):
+        return self.path
+
+    def getCount(self):
+        return self.count
+
+    def serialize(self, event: pygame.event.Event):
+        mods = event.mod if hasattr(event, 'mod') else pygame.key.get_mods()
+        attributes = {name: value for name, value in event.dict.items()
+                      if name != 'mod' and isSerializable(value)}
+
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_v and mods & pygame.KMOD_CTRL:
+            attributes['clipboard'] = getText()
+
+        return [event.type, mods, attributes]
+
+    def record(self, events: List[pygame.event.Event]):
+        recorded = [self.serialize(event) for event in events
+                    if event.type not in self.skipped_types]
+
+        if recorded:
+            elapsed = round((time.perf_counter() - self.started) * 1000, 3)
+
+            self.file.write(json.dumps([elapsed, recorded],
+                                       separators=(',', ':')) + '\n')
+            self.count += len(recorded)
+
+    def close(self):
+        self.file.close()
+
+
+class InputTrace(object):
+    def __init__(self, path: str):
+        self.path = path
+
+    def getPath(self):
+        return self.path
+
+    def makeEvent(self, event_type: int, mods: int, attributes: dict):
+        attributes = {name: tuple(value) if isinstance(value, list) else value
+                      for name, value in attributes.items()}
+        attributes['mod'] = mods
+
+        return pygame.event.Event(event_type, attributes)
+
+    def __iter__(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as file:
+            while True:
+                try:
+                    line = file.readline()
+                    elapsed, recorded = json.loads(line)
+                except (EOFError, zlib.error, ValueError):
+                    break
+
+                events: List[pygame.event.Event] = [
+                    self.makeEvent(*event) for event in recorded]
+
+                yield elapsed, events
+
+    def read(self) -> List[Tuple[float, List[pygame.event.Event]]]:
+        return list(self)
@@ -0,0 +1,179 @@
+import os
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+import pygame
+
+from classes.text_layout import TextLayout
+
+
+class Journal(object):
+    def __init__(self, path: str, compact_size: int = 100000):
+        self.path = path
+        self.snapshot_path = path + '.snapshot'
+        self.compact_size = max(compact_size, 1)
+        self.pending: List[str] = []
+        self.size = 0
+        self.cursor: Optional[Tuple[int, int]] = None
+
+    def getPath(self):
+        return self.path
+
+    def getSnapshotPath(self):
+        return self.snapshot_path
+
+    def getPendingCount(self):
+        return len(self.pending)
+
+    def getSize(self):
+        return self.size
+
+    def getCompactSize(self):
+        return self.compact_size
+
+    def setCompactSize(self, compact_size: int):
+        self.compact_size = max(compact_size, 1)
+
+    def exists(self):
+        return os.path.exists(self.path) or os.path.exists(self.snapshot_path)
+
+    def formatSet(self, position: Tuple[int, int], drawable: Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]):
+        point = ord(drawable[0]) if drawable[0] else 0
+
+        return f's {position[0]} {position[1]} {point} {" ".join(map(str, drawable[2]))} {" ".join(map(str, drawable[3]))}'
+
+    def formatDelete(self, position: Tuple[int, int]):
+        return f'd {position[0]} {position[1]}'
+
+    def formatCursor(self, position: Tuple[int, int]):
+        return f'c {position[0]} {position[1]}'
+
+    def formatMap(self, path: str, origin: Tuple[int, int], unit_sizes: Tuple[int, ...], tint: Tuple[int, ...]):
+        return f'm {origin[0]} {origin[1]} {" ".join(map(str, unit_sizes))} {" ".join(map(str, tint))} {path}'
+
+    def formatLayout(self, path: str, line_count: int, origin: Tuple[int, int], unit_sizes: Tuple[int, ...], tint: Tuple[int, ...]):
+        return f'l {origin[0]} {origin[1]} {" ".join(map(str, unit_sizes))} {" ".join(map(str, tint))} {line_count} {path}'
+
+    def formatClearRow(self, y: int):
+        return f'e {y}'
+
+    def set(self, position: Tuple[int, int], drawable: Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]):
+        self.pending.append(self.formatSet(position, drawable))
+
+    def delete(self, position: Tuple[int, int]):
+        self.pending.append(self.formatDelete(position))
+
+    def moveCursor(self, position: Tuple[int, int]):
+        if position != self.cursor:
+            self.cursor = position
+            self.pending.append(self.formatCursor(position))
+
+    def map(self, path: str, origin: Tuple[int, int], unit_sizes: Tuple[int, ...], tint: Tuple[int, ...]):
+        self.pending.append(self.formatMap(path, origin, unit_sizes, tint))
+
+    def layout(self, layout: TextLayout, origin: Tuple[int, int], unit_sizes: Tuple[int, ...], tint: Tuple[int, ...]):
+        path = self.getLayoutPath()
+
+        with open(path, 'wb') as file:
+            layout.getLengths().tofile(file)
+            layout.getPoints().tofile(file)
+            file.flush()
+            os.fsync(file.fileno())
+
+        self.pending.append(self.formatLayout(os.path.abspath(path), layout.getLineCount(),
+                                              origin, unit_sizes, tint))
+
+    def getLayoutPath(self):
+        index = 1
+
+        while os.path.exists(f'{self.path}.layout.{index}'):
+            index += 1
+
+        return f'{self.path}.layout.{index}'
+
+    def getLayoutPaths(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        prefix = os.path.basename(self.path) + '.layout.'
+
+        return [os.path.join(directory, name) for name in os.listdir(directory)
+                if name.startswith(prefix) and name[len(prefix):].isdigit()]
+
+    def readLayout(self, path: str, line_count: int):
+        lengths = array('I')
+        points = array('I')
+
+        with open(path, 'rb') as file:
+            lengths.fromfile(file, line_count)
+            points.frombytes(file.read())
+
+        return TextLayout.fromArrays(lengths, points)
+
+    def removeLayouts(self):
+        for path in self.getLayoutPaths():
+            os.remove(path)
+
+    def reset(self):
+        self.pending.append('r')
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write('\n'.join(self.pending) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+        self.size += len(self.pending)
+        self.pending = []
+
+    def shouldCompact(self):
+        return self.size >= self.compact_size
+
+    def compact(self, lines: Iterable[str]):
+        temporary_path = self.snapshot_path + '.tmp'
+
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            for line in lines:
+                file.write(line + '\n')
+
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary_path, self.snapshot_path)
+
+        open(self.path, 'w').close()
+        self.removeLayouts()
+
+        self.size = 0
+        self.pending = []
+
+    def readLines(self, path: str):
+        if not os.path.exists(path):
+            return
+
+        with open(path, encoding='utf-8', errors='replace') as file:
+            for line in file:
+                if line.endswith('\n'):
+                    yield line[:-1]
+
+    def read(self):
+        for path in (self.snapshot_path, self.path):
+            for line in self.readLines(path):
+                if line:
+                    if line[0] == 'm':
+                        yield line.split(' ', 8)
+                    elif line[0] == 'l':
+                        yield line.split(' ', 9)
+                    else:
+                        yield line.split(' ')
+
+    def discard(self):
+        for path in (self.path, self.snapshot_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+        self.removeLayouts()
+        self.size = 0
+        self.pending = []
+        self.cursor = None
@@ -0,0 +1,86 @@
+import mmap
+import os
+from array import array
+from typing import Callable
+
+from constants import PARALLEL_INDEX_SIZE
+from utils.file import getLineChunks, mapChunks
+
+
+def indexChunk(path: str, start: int, end: int, last: bool):
+    offsets = array('Q')
+
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+        find = mapping.find
+        position = find(b'\n', start, end)
+
+        while position != -1:
+            offsets.append(position + 1)
+            position = find(b'\n', position + 1, end)
+
+    return offsets.tobytes()
+
+
+class MappedFile(object):
+    def __init__(self, path: str, encoding: str = 'utf-8', progress: Callable[[float], None] = None, chunks: int = 64, workers: int = None):
+        self.path = path
+        self.encoding = encoding
+        self.file = open(path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.mapping = mmap.mmap(
+            self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self.offsets = array('Q', [0])
+        self.references = 1
+
+        if workers == None and self.size < PARALLEL_INDEX_SIZE:
+            workers = 1
+
+        if self.mapping:
+            for offsets in mapChunks(indexChunk, path, getLineChunks(path, chunks), workers=workers, progress=progress):
+                self.offsets.frombytes(offsets)
+
+    def getPath(self):
+        return self.path
+
+    def getSize(self):
+        return self.size
+
+    def getLineCount(self):
+        return len(self.offsets)
+
+    def getLineBytes(self, index: int):
+        if not self.mapping:
+            return b''
+
+        start = self.offsets[index]
+        end = self.offsets[index + 1] - \
+            1 if index + 1 < len(self.offsets) else self.size
+
+        return self.mapping[start:end]
+
+    def getLine(self, index: int):
+        return self.getLineBytes(index).decode(self.encoding, errors='replace')
+
+    def getLines(self, start: int, end: int):
+        if not self.mapping:
+            return [''] * (end - start)
+
+        stop = self.offsets[end] - 1 if end < len(self.offsets) else self.size
+
+        return self.mapping[self.offsets[start]:stop].decode(self.encoding, errors='replace').split('\n')
+
+    def share(self):
+        self.references += 1
+
+        return self
+
+    def close(self):
+        self.references -= 1
+
+        if self.references > 0:
+            return
+
+        if self.mapping:
+            self.mapping.close()
+
+        self.file.close()
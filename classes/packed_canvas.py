@@ -0,0 +1,35 @@
+import sys
+from array import array
+from typing import List, Tuple
+
+
+class PackedCanvas(object):
+    def __init__(self, text: str, runs: array, sizes: List[Tuple[int, ...]], tints: List[Tuple[int, ...]], tint_runs: array):
+        self.text = text
+        self.runs = runs
+        self.sizes = sizes
+        self.tints = tints
+        self.tint_runs = tint_runs
+
+    def getText(self):
+        return self.text
+
+    def getRuns(self):
+        return zip(self.runs[0::4], self.runs[1::4], self.runs[2::4], self.runs[3::4])
+
+    def getSizes(self):
+        return self.sizes
+
+    def getTints(self):
+        return self.tints
+
+    def getTintRuns(self):
+        return zip(self.tint_runs[0::2], self.tint_runs[1::2])
+
+    def getCount(self):
+        return len(self.text)
+
+    def getMemoryEstimate(self):
+        return sys.getsizeof(self.text) + sys.getsizeof(self.runs) + sys.getsizeof(self.tint_runs) + \
+            sum(sys.getsizeof(size) for size in self.sizes) + \
+            sum(sys.getsizeof(tint) for tint in self.tints)
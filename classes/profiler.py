@@ -0,0 +1,131 @@
+import csv
+import json
+import time
+from functools import wraps
+from typing import IO, Callable, Dict, List, Optional, TypeVar
+
+import pygame
+
+F = TypeVar('F', bound=Callable)
+
+
+class Profiler(object):
+    def __init__(self):
+        self.enabled = False
+        self.overlay = False
+        self.log: Optional[IO[str]] = None
+        self.log_writer: Optional[csv.DictWriter] = None
+        self.font: Optional[pygame.font.Font] = None
+        self.counts: Dict[str, int] = {}
+        self.times: Dict[str, float] = {}
+        self.frame = 0
+        self.last_row: Dict[str, float] = {}
+        self.overlay_size = 0, 0
+
+    def isEnabled(self):
+        return self.enabled
+
+    def isOverlayVisible(self):
+        return self.overlay
+
+    def updateEnabled(self):
+        self.enabled = self.overlay or self.log != None
+
+    def toggleOverlay(self):
+        self.overlay = not self.overlay
+        self.updateEnabled()
+
+    def openLog(self, path: str):
+        self.closeLog()
+        self.log = open(path, 'w', newline='')
+        self.log_writer = None
+        self.updateEnabled()
+
+    def closeLog(self):
+        if self.log:
+            self.log.close()
+
+        self.log = None
+        self.log_writer = None
+        self.updateEnabled()
+
+    def count(self, name: str, amount: int = 1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def addTime(self, name: str, elapsed: float):
+        self.counts[name] = self.counts.get(name, 0) + 1
+        self.times[name] = self.times.get(name, 0.0) + elapsed
+
+    def getCount(self, name: str):
+        return self.counts.get(name, 0)
+
+    def getTime(self, name: str):
+        return self.times.get(name, 0.0)
+
+    def getLastRow(self):
+        return self.last_row
+
+    def endFrame(self, row: Dict[str, float]):
+        self.frame += 1
+        self.last_row = {'frame': self.frame, **row}
+
+        if self.log:
+            if self.log.name.endswith('.json') or self.log.name.endswith('.jsonl'):
+                self.log.write(json.dumps(self.last_row) + '\n')
+            else:
+                if self.log_writer == None:
+                    self.log_writer = csv.DictWriter(
+                        self.log, fieldnames=list(self.last_row.keys()))
+                    self.log_writer.writeheader()
+
+                self.log_writer.writerow(self.last_row)
+
+        self.counts = {}
+        self.times = {}
+
+    def drawOverlay(self, screen: pygame.Surface, font_path: str, font_size: int = 8):
+        if self.font == None:
+            self.font = pygame.font.Font(font_path, font_size)
+
+        lines: List[str] = [f'{name} {value:.2f}' if isinstance(value, float) else f'{name} {value}'
+                            for name, value in self.last_row.items()]
+        surfaces = [self.font.render(line, False, (255, 255, 255), (32, 32, 32))
+                    for line in lines]
+        width = max((surface.get_width() for surface in surfaces), default=0)
+        height = sum(surface.get_height() for surface in surfaces)
+        self.overlay_size = max(self.overlay_size[0], width + 4), max(
+            self.overlay_size[1], height + 4)
+        rect = pygame.Rect(
+            screen.get_width() - self.overlay_size[0], 0, *self.overlay_size)
+
+        screen.fill((32, 32, 32), rect)
+
+        y = rect.y + 2
+
+        for surface in surfaces:
+            screen.blit(surface, (rect.x + 2, y))
+            y += surface.get_height()
+
+        return rect
+
+
+PROFILER = Profiler()
+
+
+def profiled(name: str):
+    def decorate(function: F) -> F:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+
+            started = time.perf_counter()
+
+            try:
+                return function(*args, **kwargs)
+            finally:
+                PROFILER.addTime(name, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,293 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class SearchLine(object):
+    def __init__(self, text: str, starts: List[int], xs: List[int], steps: List[int]):
+        self.text = text
+        self.starts = starts
+        self.xs = xs
+        self.steps = steps
+
+    @staticmethod
+    def fromCells(cells: Iterable[Tuple[int, str, int]]):
+        characters: List[str] = []
+        starts: List[int] = []
+        xs: List[int] = []
+        steps: List[int] = []
+        expected_x = None
+        step = 0
+
+        for x, character, width in cells:
+            if expected_x != None and x > expected_x and (x - expected_x) % step == 0:
+                characters.extend(' ' for _ in range((x - expected_x) // step))
+                expected_x = x
+
+            if x != expected_x or width != step:
+                starts.append(len(characters))
+                xs.append(x)
+                steps.append(width)
+                step = width
+
+            characters.append(character or ' ')
+            expected_x = x + width
+
+        return SearchLine(''.join(characters), starts, xs, steps)
+
+    def getText(self):
+        return self.text
+
+    def getShape(self):
+        return tuple(self.starts), tuple(self.xs), tuple(self.steps)
+
+    def getX(self, index: int):
+        segment = bisect_right(self.starts, index) - 1
+
+        return self.xs[segment] + (index - self.starts[segment]) * self.steps[segment]
+
+    def getIndex(self, x: int):
+        segment = bisect_right(self.xs, x) - 1
+
+        if segment < 0:
+            return 0
+
+        index = self.starts[segment] + -(-(x - self.xs[segment]) //
+                                         self.steps[segment])
+
+        if segment + 1 < len(self.starts):
+            return min(index, self.starts[segment + 1])
+
+        return min(index, len(self.text))
+
+
+class SearchBlock(object):
+    def __init__(self, lines: List[Tuple[int, SearchLine]]):
+        self.ys: List[int] = []
+        self.texts: List[str] = []
+        self.shapes: List[Tuple[Tuple[int, ...], ...]] = []
+        self.shared: Dict[Tuple[Tuple[int, ...], ...], Tuple[Tuple[int, ...], ...]] = {}
+        self.text: Optional[str] = None
+        self.offsets: List[int] = []
+
+        for y, line in lines:
+            self.ys.append(y)
+            self.texts.append(line.getText())
+            self.shapes.append(self.share(line))
+
+    def share(self, line: SearchLine):
+        shape = line.getShape()
+
+        return self.shared.setdefault(shape, shape)
+
+    def getLine(self, key: int):
+        return SearchLine(self.texts[key], *self.shapes[key])
+
+    def setLine(self, y: int, line: Optional[SearchLine]):
+        key = bisect_left(self.ys, y)
+        present = key < len(self.ys) and self.ys[key] == y
+
+        if line and line.getText():
+            if present:
+                self.texts[key] = line.getText()
+                self.shapes[key] = self.share(line)
+            else:
+                self.ys.insert(key, y)
+                self.texts.insert(key, line.getText())
+                self.shapes.insert(key, self.share(line))
+        elif present:
+            del self.ys[key]
+            del self.texts[key]
+            del self.shapes[key]
+
+        self.text = None
+
+    def getText(self):
+        if self.text == None:
+            self.offsets = []
+            offset = 0
+
+            for text in self.texts:
+                self.offsets.append(offset)
+                offset += len(text) + 1
+
+            self.text = '\n'.join(self.texts)
+
+        return self.text
+
+    def locate(self, offset: int):
+        key = bisect_right(self.offsets, offset) - 1
+
+        return self.getLine(key).getX(offset - self.offsets[key]), self.ys[key]
+
+    def getOffset(self, position: Tuple[int, int]):
+        x, y = position
+        text = self.getText()
+        key = bisect_left(self.ys, y)
+
+        if key == len(self.ys):
+            return len(text), False
+
+        if self.ys[key] != y:
+            return self.offsets[key], False
+
+        line = self.getLine(key)
+        index = line.getIndex(x)
+
+        return self.offsets[key] + index, index < len(line.getText()) and line.getX(index) == x
+
+    def find(self, query: str, start: int = 0, end: int = None, backwards: bool = False):
+        text = self.getText()
+
+        if backwards:
+            return text.rfind(query, start, len(text) if end == None else end)
+
+        return text.find(query, start)
+
+    def findIn(self, query: str, top: int, bottom: int):
+        matches: List[Tuple[SearchLine, int, int]] = []
+
+        for key in range(bisect_left(self.ys, top), bisect_left(self.ys, bottom)):
+            text = self.texts[key]
+            index = text.find(query)
+
+            while index != -1:
+                matches.append((self.getLine(key), self.ys[key], index))
+                index = text.find(query, index + 1)
+
+        return matches
+
+
+class SearchIndex(object):
+    def __init__(self, source: object, block_size: int = 1 << 14):
+        self.source = source
+        self.block_size = block_size
+        self.blocks: Dict[int, SearchBlock] = {}
+        self.stale: Dict[int, Set[int]] = {}
+        self.version = 0
+        self.warm_key: Optional[int] = None
+        self.warm = False
+
+    def clear(self):
+        self.blocks = {}
+        self.stale = {}
+        self.version += 1
+        self.warm_key = None
+        self.warm = False
+
+    def isWarm(self):
+        return self.warm
+
+    def warmStep(self, count: int = 1):
+        if self.warm:
+            return False
+
+        if self.warm_key == None:
+            if not (bounds := self.source.getDocumentBounds()):
+                self.warm = True
+                return False
+
+            self.warm_key = bounds[0] // self.block_size
+
+        keys = self.iterKeys(self.warm_key)
+
+        while count > 0:
+            if self.warm_key not in self.blocks:
+                count -= 1
+
+            self.getBlock(self.warm_key).getText()
+
+            if (key := next(keys, None)) == None:
+                self.warm_key = None
+                self.warm = True
+                return False
+
+            self.warm_key = key
+
+        return True
+
+    def getVersion(self):
+        return self.version
+
+    def invalidate(self, y: int):
+        if (key := y // self.block_size) in self.blocks:
+            self.stale.setdefault(key, set()).add(y)
+        else:
+            self.warm = False
+
+        self.version += 1
+
+    def getBlock(self, key: int):
+        if (block := self.blocks.get(key)) == None:
+            self.stale.pop(key, None)
+            block = self.blocks[key] = SearchBlock(self.source.getSearchLines(
+                key * self.block_size, (key + 1) * self.block_size))
+        elif (rows := self.stale.pop(key, None)):
+            for y in rows:
+                block.setLine(y, self.source.getSearchLine(y))
+
+        return block
+
+    def iterKeys(self, key: int, backwards: bool = False):
+        while True:
+            if backwards:
+                y = self.source.getPreviousRowY(key * self.block_size)
+            else:
+                y = self.source.getNextRowY((key + 1) * self.block_size - 1)
+
+            if y == None:
+                return
+
+            key = y // self.block_size
+
+            yield key
+
+    def findFrom(self, query: str, key: int, backwards: bool = False, last: int = None):
+        keys = self.iterKeys(key, backwards)
+
+        while key != None and (last == None or (key >= last if backwards else key <= last)):
+            block = self.getBlock(key)
+
+            if (offset := block.find(query, backwards=backwards)) != -1:
+                return block.locate(offset)
+
+            key = next(keys, None)
+
+        return None
+
+    def find(self, query: str, position: Tuple[int, int], backwards: bool = False, inclusive: bool = False):
+        if not query or '\n' in query:
+            return None
+
+        key = position[1] // self.block_size
+        block = self.getBlock(key)
+        start, exact = block.getOffset(position)
+        skip = 0 if inclusive and exact else 1
+
+        if backwards:
+            offset = block.find(query, 0, start + len(query) - skip, True)
+        else:
+            offset = block.find(query, start + (skip if exact else 0))
+
+        if offset != -1:
+            return block.locate(offset)
+
+        following = next(self.iterKeys(key, backwards), None)
+
+        if following != None and (found := self.findFrom(query, following, backwards)):
+            return found
+
+        if not (bounds := self.source.getDocumentBounds()):
+            return None
+
+        return self.findFrom(query, bounds[1 if backwards else 0] // self.block_size, backwards, key)
+
+    def findIn(self, query: str, top: int, bottom: int):
+        matches: List[Tuple[SearchLine, int, int]] = []
+
+        if not query or top >= bottom:
+            return matches
+
+        for key in range(top // self.block_size, (bottom - 1) // self.block_size + 1):
+            matches.extend(self.getBlock(key).findIn(query, top, bottom))
+
+        return matches
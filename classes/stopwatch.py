@@ -0,0 +1,31 @@
+import time
+from typing import List, Tuple
+
+
+class Stopwatch(object):
+    def __init__(self, start: float = None):
+        self.start = start if start != None else time.perf_counter()
+        self.marks: List[Tuple[str, float]] = []
+
+    def getStart(self):
+        return self.start
+
+    def getMarks(self):
+        return self.marks
+
+    def getElapsed(self):
+        return time.perf_counter() - self.start
+
+    def mark(self, name: str):
+        self.marks.append((name, self.getElapsed()))
+
+    def report(self):
+        lines: List[str] = []
+        last = 0.0
+
+        for name, elapsed in self.marks:
+            lines.append(
+                f'{name}: {elapsed * 1000:.1f} ms (+{(elapsed - last) * 1000:.1f} ms)')
+            last = elapsed
+
+        return '\n'.join(lines)
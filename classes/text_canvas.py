@@ -0,0 +1,476 @@
+import codecs
+import sys
+from array import array
+from bisect import bisect_left, insort
+from heapq import merge
+from collections.abc import Mapping
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import pygame
+
+from classes.canvas import Canvas
+from classes.packed_canvas import PackedCanvas
+
+decode_points = codecs.getdecoder(f'utf-32-{sys.byteorder[0]}e')
+
+
+class TextRow(object):
+    def __init__(self, xs: array = None, points: array = None, sizes: array = None, tints: array = None):
+        self.xs = array('i') if xs == None else xs
+        self.points = array('I') if points == None else points
+        self.sizes = array('H') if sizes == None else sizes
+        self.tints = array('H') if tints == None else tints
+
+    def insert(self, index: int, x: int, point: int, size: int, tint: int):
+        self.xs.insert(index, x)
+        self.points.insert(index, point)
+        self.sizes.insert(index, size)
+        self.tints.insert(index, tint)
+
+    def set(self, index: int, point: int, size: int, tint: int):
+        self.points[index] = point
+        self.sizes[index] = size
+        self.tints[index] = tint
+
+    def copy(self):
+        row = TextRow()
+        row.xs = self.xs[:]
+        row.points = self.points[:]
+        row.sizes = self.sizes[:]
+        row.tints = self.tints[:]
+
+        return row
+
+    def pop(self, index: int):
+        self.xs.pop(index)
+        self.points.pop(index)
+        self.sizes.pop(index)
+        self.tints.pop(index)
+
+
+class TextCanvasView(Mapping):
+    def __init__(self, canvas: 'TextCanvas'):
+        self.canvas = canvas
+
+    def __getitem__(self, position: Tuple[int, int]):
+        drawable = self.canvas.getDrawable(position)
+
+        if drawable is None:
+            raise KeyError(position)
+
+        return drawable
+
+    def __contains__(self, position: object):
+        return self.canvas.getDrawable(position) is not None
+
+    def __iter__(self):
+        for y in self.canvas.getRows():
+            for x in self.canvas.getRow(y):
+                yield x, y
+
+    def __len__(self):
+        return self.canvas.getCount()
+
+    def items(self):
+        return [((x, y), drawable) for y in self.canvas.getRows()
+                for x, drawable in self.canvas.getRowDrawables(y)]
+
+
+class TextCanvas(Canvas[Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]]):
+
+    def __init__(self, render: Callable[[str], pygame.Surface], drawables: Dict[Tuple[int, int], Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]] = None):
+        self.render = render
+        self.characters: Dict[int, Tuple[str, pygame.Surface]] = {}
+        self.sizes: List[Tuple[int, ...]] = []
+        self.size_indices: Dict[Tuple[int, ...], int] = {}
+        self.tints: List[Tuple[int, ...]] = []
+        self.tint_indices: Dict[Tuple[int, ...], int] = {}
+        self.changed_rows: Set[int] = set()
+        self.changed_all = True
+        self.uniform_xs: Dict[Tuple[int, int], array] = {}
+
+        super().__init__(drawables or {})
+
+    def getSizeIndex(self, size: Tuple[int, ...]):
+        if (index := self.size_indices.get(size)) == None:
+            index = self.size_indices[size] = len(self.sizes)
+            self.sizes.append(size)
+
+        return index
+
+    def getMaxSizes(self):
+        return max((size[0] for size in self.sizes), default=1), max((size[1] for size in self.sizes), default=1)
+
+    def getTintIndex(self, tint: Tuple[int, ...]):
+        if (index := self.tint_indices.get(tint)) == None:
+            index = self.tint_indices[tint] = len(self.tints)
+            self.tints.append(tint)
+
+        return index
+
+    def copy(self):
+        canvas = TextCanvas(self.render)
+        canvas.sizes = list(self.sizes)
+        canvas.size_indices = dict(self.size_indices)
+        canvas.tints = list(self.tints)
+        canvas.tint_indices = dict(self.tint_indices)
+        canvas.rows = {y: row.copy() for y, row in self.rows.items()}
+        canvas.row_keys = list(self.row_keys)
+        canvas.count = self.count
+
+        return canvas
+
+    def pack(self):
+        points = array('I')
+        runs = array('i')
+        tint_runs = array('I')
+
+        for y in self.row_keys:
+            row = self.rows[y]
+            count = len(row.xs)
+            width = self.sizes[row.sizes[0]][0]
+
+            points.extend(row.points)
+
+            if row.sizes.count(row.sizes[0]) == count and row.xs == self.getUniformXs(row.xs[0], width, count):
+                runs.extend((y, row.xs[0], count, row.sizes[0]))
+            else:
+                start = 0
+
+                for index in range(1, count + 1):
+                    if index == count or row.sizes[index] != row.sizes[start] or \
+                            row.xs[index] != row.xs[index - 1] + self.sizes[row.sizes[start]][0]:
+                        runs.extend(
+                            (y, row.xs[start], index - start, row.sizes[start]))
+                        start = index
+
+            if row.tints.count(row.tints[0]) == count:
+                tints = [(count, row.tints[0])]
+            else:
+                tints = []
+
+                for tint in row.tints:
+                    if tints and tints[-1][1] == tint:
+                        tints[-1] = tints[-1][0] + 1, tint
+                    else:
+                        tints.append((1, tint))
+
+            for length, tint in tints:
+                if tint_runs and tint_runs[-1] == tint:
+                    tint_runs[-2] += length
+                else:
+                    tint_runs.extend((length, tint))
+
+        return PackedCanvas(decode_points(points.tobytes(), 'surrogatepass')[0], runs,
+                            list(self.sizes), list(self.tints), tint_runs)
+
+    def unpack(self, packed: PackedCanvas):
+        self.setDrawables({})
+        self.sizes = list(packed.getSizes())
+        self.size_indices = {size: index for index,
+                             size in enumerate(self.sizes)}
+        self.tints = list(packed.getTints())
+        self.tint_indices = {tint: index for index,
+                             tint in enumerate(self.tints)}
+
+        points = array('I')
+        points.frombytes(packed.getText().encode(
+            f'utf-32-{sys.byteorder[0]}e', errors='surrogatepass'))
+        tints = array('H')
+
+        for length, tint in packed.getTintRuns():
+            tints.extend(array('H', [tint]) * length)
+
+        offset = 0
+
+        for y, x, length, size in packed.getRuns():
+            width = self.sizes[size][0]
+
+            end = offset + length
+
+            if (row := self.rows.get(y)) == None:
+                self.rows[y] = TextRow(self.getUniformXs(x, width, length), points[offset:end],
+                                       array('H', [size]) * length, tints[offset:end])
+                self.row_keys.append(y)
+            else:
+                row.xs.extend(self.getUniformXs(x, width, length))
+                row.points.extend(points[offset:end])
+                row.sizes.extend(array('H', [size]) * length)
+                row.tints.extend(tints[offset:end])
+
+            offset = end
+
+        self.count = len(points)
+
+    def getDrawables(self):
+        return TextCanvasView(self)
+
+    def setDrawables(self, drawables: Dict[Tuple[int, int], Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]]):
+        items = list(drawables.items())
+
+        self.rows: Dict[int, TextRow] = {}
+        self.row_keys: List[int] = []
+        self.count = 0
+        self.changed_all = True
+
+        for position, drawable in items:
+            self.setDrawable(position, drawable)
+
+    def getCount(self):
+        return self.count
+
+    def hasChangedRows(self):
+        return self.changed_all or bool(self.changed_rows)
+
+    def popChangedRows(self):
+        changed = self.changed_all, self.changed_rows
+
+        self.changed_all = False
+        self.changed_rows = set()
+
+        return changed
+
+    def makeDrawable(self, row: TextRow, index: int):
+        point = row.points[index]
+
+        if (character := self.characters.get(point)) == None:
+            text = chr(point) if point else ''
+            character = self.characters[point] = text, self.render(text or ' ')
+
+        return character[0], character[1], self.sizes[row.sizes[index]], self.tints[row.tints[index]]
+
+    def getDrawable(self, position: Tuple[int, int]):
+        x, y = position
+
+        if (row := self.rows.get(y)) == None:
+            return None
+
+        index = bisect_left(row.xs, x)
+
+        if index < len(row.xs) and row.xs[index] == x:
+            return self.makeDrawable(row, index)
+
+    def setDrawable(self, position: Tuple[int, int], drawable: Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]):
+        x, y = position
+        point = ord(drawable[0]) if drawable[0] else 0
+        size = self.getSizeIndex(tuple(drawable[2]))
+        tint = self.getTintIndex(tuple(drawable[3]))
+
+        if (row := self.rows.get(y)) == None:
+            row = self.rows[y] = TextRow()
+            insort(self.row_keys, y)
+
+        index = bisect_left(row.xs, x)
+        self.changed_rows.add(y)
+
+        if index < len(row.xs) and row.xs[index] == x:
+            row.set(index, point, size, tint)
+        else:
+            row.insert(index, x, point, size, tint)
+            self.count += 1
+
+    def applyDrawables(self, drawables: Dict[Tuple[int, int], Optional[Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]]]):
+        row_changes: Dict[int, Dict[int, Optional[Tuple[int, int, int]]]] = {}
+
+        for (x, y), drawable in drawables.items():
+            if (changes := row_changes.get(y)) == None:
+                changes = row_changes[y] = {}
+
+            if drawable is None:
+                changes[x] = None
+            else:
+                changes[x] = ord(drawable[0]) if drawable[0] else 0, self.getSizeIndex(
+                    tuple(drawable[2])), self.getTintIndex(tuple(drawable[3]))
+
+        for y, changes in row_changes.items():
+            self.applyRow(y, changes)
+
+    def applyRow(self, y: int, changes: Dict[int, Optional[Tuple[int, int, int]]]):
+        if (row := self.rows.get(y)) == None:
+            row = TextRow()
+            cells = {}
+        else:
+            cells = dict(zip(row.xs, zip(row.points, row.sizes, row.tints)))
+
+        self.count -= len(cells)
+
+        for x, cell in changes.items():
+            if cell == None:
+                cells.pop(x, None)
+            else:
+                cells[x] = cell
+
+        self.count += len(cells)
+        self.changed_rows.add(y)
+
+        if not cells:
+            if y in self.rows:
+                del self.rows[y]
+                del self.row_keys[bisect_left(self.row_keys, y)]
+
+            return
+
+        xs = sorted(cells)
+        row.xs = array('i', xs)
+        row.points = array('I', [cells[x][0] for x in xs])
+        row.sizes = array('H', [cells[x][1] for x in xs])
+        row.tints = array('H', [cells[x][2] for x in xs])
+
+        if y not in self.rows:
+            self.rows[y] = row
+            insort(self.row_keys, y)
+
+    def insertLines(self, starts: List[int], top: int, step: int, size: Tuple[int, ...], tint: Tuple[int, ...], lengths: array, points: array):
+        size_index = self.getSizeIndex(tuple(size))
+        tint_index = self.getTintIndex(tuple(tint))
+        width = size[0]
+        added: List[int] = []
+        offset = 0
+        y = top
+
+        for start, length in zip(starts, lengths):
+            if length:
+                if y in self.rows:
+                    self.applyRow(y, {start + index * width: (points[offset + index], size_index, tint_index)
+                                      for index in range(length)})
+                else:
+                    row = self.rows[y] = TextRow()
+                    row.xs = array('i', range(start, start + length * width, width))
+                    row.points = points[offset:offset + length]
+                    row.sizes = array('H', [size_index]) * length
+                    row.tints = array('H', [tint_index]) * length
+                    self.count += length
+                    self.changed_rows.add(y)
+                    added.append(y)
+
+            offset += length
+            y += step
+
+        if added:
+            self.row_keys = list(merge(self.row_keys, added))
+
+    def deleteDrawable(self, position: Tuple[int, int]):
+        x, y = position
+
+        if (row := self.rows.get(y)) == None:
+            return
+
+        index = bisect_left(row.xs, x)
+
+        if index < len(row.xs) and row.xs[index] == x:
+            row.pop(index)
+            self.count -= 1
+            self.changed_rows.add(y)
+
+            if not row.xs:
+                del self.rows[y]
+                del self.row_keys[bisect_left(self.row_keys, y)]
+
+    def getRow(self, y: int):
+        if (row := self.rows.get(y)) == None:
+            return array('i')
+
+        return row.xs
+
+    def getUniformRowText(self, y: int):
+        if (row := self.rows.get(y)) == None:
+            return None
+
+        size = row.sizes[0]
+        width = self.sizes[size][0]
+        start = row.xs[0]
+
+        if row.sizes.count(size) != len(row.sizes) or row.xs != self.getUniformXs(start, width, len(row.xs)):
+            return None
+
+        return decode_points(row.points.tobytes(), 'replace')[0].replace('\x00', ' '), start, width
+
+    def getUniformXs(self, start: int, width: int, count: int):
+        if len(xs := self.uniform_xs.get((start, width), array('i'))) < count:
+            if len(self.uniform_xs) >= 64:
+                self.uniform_xs = {}
+
+            length = max(count, len(xs) * 2, 256)
+            xs = self.uniform_xs[start, width] = array(
+                'i', range(start, start + length * width, width))
+
+        return xs[:count]
+
+    def getRowDrawables(self, y: int, left: int = None, right: int = None):
+        if (row := self.rows.get(y)) == None:
+            return
+
+        start = bisect_left(row.xs, left) if left != None else 0
+        end = bisect_left(row.xs, right) if right != None else len(row.xs)
+
+        for index in range(start, end):
+            yield row.xs[index], self.makeDrawable(row, index)
+
+    def getRowCells(self, y: int):
+        if (row := self.rows.get(y)) == None:
+            return
+
+        for x, point, size in zip(row.xs, row.points, row.sizes):
+            yield x, chr(point) if point else '', self.sizes[size][0]
+
+    def getWordClass(self, row: TextRow, index: int):
+        point = row.points[index]
+
+        if not point or chr(point).isspace():
+            return 0
+
+        if chr(point).isalnum() or point == ord('_'):
+            return 1
+
+        return 2
+
+    def isAdjacent(self, row: TextRow, index: int):
+        return row.xs[index + 1] == row.xs[index] + self.sizes[row.sizes[index]][0]
+
+    def getRowEnd(self, y: int):
+        if (row := self.rows.get(y)) == None:
+            return None
+
+        return row.xs[-1] + self.sizes[row.sizes[-1]][0]
+
+    def getNextWord(self, position: Tuple[int, int]):
+        x, y = position
+
+        if (row := self.rows.get(y)) == None:
+            return None
+
+        index = bisect_left(row.xs, x)
+        count = len(row.xs)
+
+        if index < count and row.xs[index] == x and (word_class := self.getWordClass(row, index)):
+            while index + 1 < count and self.isAdjacent(row, index) and self.getWordClass(row, index + 1) == word_class:
+                index += 1
+
+            index += 1
+
+        while index < count and not self.getWordClass(row, index):
+            index += 1
+
+        if index < count:
+            return row.xs[index]
+
+    def getPreviousWord(self, position: Tuple[int, int]):
+        x, y = position
+
+        if (row := self.rows.get(y)) == None:
+            return None
+
+        index = bisect_left(row.xs, x) - 1
+
+        while index >= 0 and not self.getWordClass(row, index):
+            index -= 1
+
+        if index < 0:
+            return None
+
+        word_class = self.getWordClass(row, index)
+
+        while index > 0 and self.isAdjacent(row, index - 1) and self.getWordClass(row, index - 1) == word_class:
+            index -= 1
+
+        return row.xs[index]
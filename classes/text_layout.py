@@ -0,0 +1,57 @@
+import locale
+import sys
+from array import array
+from typing import Callable
+
+ENCODING = f'utf-32-{sys.byteorder[0]}e'
+
+
+def layoutText(text: str):
+    lines = text.replace('\x00', '').replace('\r', '').replace(
+        '\t', '\x00' * 4).split('\n')
+    lengths = array('I', map(len, lines))
+    points = array('I')
+    points.frombytes(''.join(lines).encode(ENCODING, errors='surrogatepass'))
+
+    return lengths, points
+
+
+class TextLayout(object):
+    def __init__(self, path: str = None, encoding: str = None, progress: Callable[[float], None] = None):
+        self.path = path
+        self.lengths = array('I')
+        self.points = array('I')
+
+        if path == None:
+            return
+
+        with open(path, 'rb') as file:
+            text = file.read().decode(encoding or locale.getpreferredencoding(False), errors='replace')
+
+        self.lengths, self.points = layoutText(text)
+
+        if progress:
+            progress(1)
+
+    @staticmethod
+    def fromArrays(lengths: array, points: array):
+        layout = TextLayout()
+        layout.lengths = lengths
+        layout.points = points
+
+        return layout
+
+    def getPath(self):
+        return self.path
+
+    def getLengths(self):
+        return self.lengths
+
+    def getPoints(self):
+        return self.points
+
+    def getLineCount(self):
+        return len(self.lengths)
+
+    def getCount(self):
+        return len(self.points)
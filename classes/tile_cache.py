@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from typing import List, Tuple
+
+import pygame
+
+from classes.glyph_cache import GlyphCache
+from classes.text_canvas import TextCanvas
+
+
+class TileCache(object):
+    def __init__(self, glyph_cache: GlyphCache, cells_x: int = 16, cells_y: int = 16, capacity: int = 48):
+        self.glyph_cache = glyph_cache
+        self.cells_x = max(cells_x, 1)
+        self.cells_y = max(cells_y, 1)
+        self.minimum_capacity = max(capacity, 1)
+        self.capacity = self.minimum_capacity
+        self.unit_sizes = 1, 1
+        self.tile_sizes = self.cells_x, self.cells_y
+        self.tiles: 'OrderedDict[Tuple[int, int], pygame.Surface]' = OrderedDict()
+        self.renders = 0
+        self.tile_blits = 0
+        self.cell_blits = 0
+
+    def getCellSizes(self):
+        return self.cells_x, self.cells_y
+
+    def getTileSizes(self):
+        return self.tile_sizes
+
+    def getCapacity(self):
+        return self.capacity
+
+    def setCapacity(self, capacity: int):
+        self.capacity = max(capacity, 1)
+
+        while len(self.tiles) > self.capacity:
+            self.tiles.popitem(last=False)
+
+    def fitGridSizes(self, grid_size_x: int, grid_size_y: int):
+        visible = (-(-grid_size_x // self.cells_x) + 1) * \
+            (-(-grid_size_y // self.cells_y) + 1)
+
+        self.setCapacity(max(self.minimum_capacity, visible * 2))
+
+    def getSize(self):
+        return len(self.tiles)
+
+    def getRenders(self):
+        return self.renders
+
+    def getTileBlits(self):
+        return self.tile_blits
+
+    def getCellBlits(self):
+        return self.cell_blits
+
+    def setUnitSizes(self, unit_sizes: Tuple[int, int]):
+        if tuple(unit_sizes) != self.unit_sizes:
+            self.unit_sizes = tuple(unit_sizes)
+            self.tile_sizes = self.cells_x * \
+                unit_sizes[0], self.cells_y * unit_sizes[1]
+            self.clear()
+
+    def getTileRect(self, key: Tuple[int, int]):
+        return pygame.Rect(key[0] * self.tile_sizes[0], key[1] * self.tile_sizes[1], *self.tile_sizes)
+
+    def getTileKeys(self, rect: pygame.Rect):
+        tile_x, tile_y = self.tile_sizes
+        keys: List[Tuple[int, int]] = []
+
+        for key_y in range(rect.top // tile_y, (rect.bottom - 1) // tile_y + 1):
+            for key_x in range(rect.left // tile_x, (rect.right - 1) // tile_x + 1):
+                keys.append((key_x, key_y))
+
+        return keys
+
+    def blitCell(self, surface: pygame.Surface, position: Tuple[int, int], drawable: Tuple[str, pygame.Surface, Tuple[int, ...], Tuple[int, ...]]):
+        surface.blit(self.glyph_cache.getGlyph(
+            drawable[0], drawable[2], drawable[3]), position)
+        self.cell_blits += 1
+
+    def getReach(self, canvas: TextCanvas):
+        max_x, max_y = canvas.getMaxSizes()
+
+        return max(max_x, self.unit_sizes[0]), max(max_y, self.unit_sizes[1])
+
+    def renderTile(self, canvas: TextCanvas, key: Tuple[int, int]):
+        rect = self.getTileRect(key)
+        surface = pygame.Surface(rect.size).convert()
+        surface.fill((0, 0, 0))
+
+        reach_x, reach_y = self.getReach(canvas)
+
+        for (x, y), drawable in canvas.getDrawablesIn(rect.left - reach_x + 1, rect.top - reach_y + 1,
+                                                      rect.right, rect.bottom):
+            self.blitCell(surface, (x - rect.left, y - rect.top), drawable)
+
+        self.renders += 1
+
+        return surface
+
+    def getTile(self, canvas: TextCanvas, key: Tuple[int, int]):
+        if (tile := self.tiles.get(key)) != None:
+            self.tiles.move_to_end(key)
+            return tile
+
+        tile = self.tiles[key] = self.renderTile(canvas, key)
+
+        if len(self.tiles) > self.capacity:
+            self.tiles.popitem(last=False)
+
+        return tile
+
+    def repaint(self, canvas: TextCanvas, position: Tuple[int, int], size: Tuple[int, int]):
+        rect = pygame.Rect(position, size)
+        reach_x, reach_y = self.getReach(canvas)
+
+        for key in self.getTileKeys(rect):
+            if (tile := self.tiles.get(key)) == None:
+                continue
+
+            tile_rect = self.getTileRect(key)
+            area = rect.clip(tile_rect)
+            tile.set_clip(area.move(-tile_rect.left, -tile_rect.top))
+            tile.fill((0, 0, 0))
+
+            for (x, y), drawable in canvas.getDrawablesIn(area.left - reach_x + 1, area.top - reach_y + 1,
+                                                          area.right, area.bottom):
+                self.blitCell(tile, (x - tile_rect.left, y - tile_rect.top), drawable)
+
+            tile.set_clip(None)
+
+    def compose(self, screen: pygame.Surface, canvas: TextCanvas, viewport: Tuple[int, int], rect: pygame.Rect):
+        for key in self.getTileKeys(rect):
+            tile_rect = self.getTileRect(key)
+            area = tile_rect.clip(rect)
+
+            screen.blit(self.getTile(canvas, key), (area.left - viewport[0], area.top - viewport[1]),
+                        area.move(-tile_rect.left, -tile_rect.top))
+            self.tile_blits += 1
+
+    def clear(self):
+        self.tiles.clear()
@@ -1,3 +1,43 @@
+from typing import Tuple
+
 import pygame
 
 CURSORFLASH: int = pygame.USEREVENT + 1
+
+FILEPROGRESS: int = pygame.USEREVENT + 2
+
+FILEDONE: int = pygame.USEREVENT + 3
+
+JOURNALFLUSH: int = pygame.USEREVENT + 4
+
+GLYPHWARM: int = pygame.USEREVENT + 5
+
+SEARCHWARM: int = pygame.USEREVENT + 6
+
+FONT_PATH: str = 'graphics/fonts/kongtext/kongtext.ttf'
+
+FONT_SIZE: int = 24
+
+JOURNAL_PATH: str = '.texedit.journal'
+
+JOURNAL_FLUSH_INTERVAL: int = 1000
+
+PACKED_HISTORY_ENTRIES: int = 16
+
+PACKED_HISTORY_CHANGES: int = 10000
+
+LARGE_FILE_SIZE: int = 1024 * 1024
+
+PARALLEL_INDEX_SIZE: int = 64 * 1024 * 1024
+
+MAX_FRAMERATE: int = 60
+
+SEARCH_TINT: Tuple[int, ...] = (96, 96, 0)
+
+SELECTION_TINT: Tuple[int, ...] = (0, 64, 128)
+
+STARTUP_REPORT_VARIABLE: str = 'TEXEDIT_STARTUP_REPORT'
+
+TRACE_VARIABLE: str = 'TEXEDIT_TRACE'
+
+PROFILE_VARIABLE: str = 'TEXEDIT_PROFILE'
@@ -1,262 +1,731 @@
-from tkinter import Tk
-from tkinter.filedialog import askopenfile, asksaveasfile
+import time
 
-import pygame
+STARTED = time.perf_counter()
 
-from classes.editor import TextEditor
-from constants import CURSORFLASH
-from utils.surface import getScaled, getTinted
+import os
+import sys
+from typing import List, Optional, Set, Tuple, Union
 
+import pygame
 
-def setup():
-    pygame.init()
+from classes.buffer_list import BufferList
+from classes.editor import TextEditor
+from classes.file_worker import FileTask, FileWorker, loadFile, storeFile
+from classes.glyph_cache import GlyphCache
+from classes.input_trace import InputRecorder
+from classes.journal import Journal
+from classes.mapped_file import MappedFile
+from classes.profiler import PROFILER
+from classes.stopwatch import Stopwatch
+from classes.text_layout import TextLayout
+from constants import CURSORFLASH, FILEDONE, FILEPROGRESS, FONT_PATH, FONT_SIZE, GLYPHWARM, JOURNAL_FLUSH_INTERVAL, JOURNAL_PATH, JOURNALFLUSH, MAX_FRAMERATE, PROFILE_VARIABLE, SEARCH_TINT, SEARCHWARM, SELECTION_TINT, STARTUP_REPORT_VARIABLE, TRACE_VARIABLE
+from utils.clipboard import getText, putText
+from utils.dialog import askOpenFile, askSavePath
+
+
+def setup(journal_path: str = JOURNAL_PATH, stopwatch: Stopwatch = None):
+    stopwatch = stopwatch or Stopwatch()
+
+    pygame.display.init()
+    pygame.font.init()
     pygame.display.set_caption('Texedit.py')
     pygame.key.set_repeat(150, 30)
+    stopwatch.mark('pygame')
+
+    font = pygame.font.Font(FONT_PATH, FONT_SIZE)
 
-    font = pygame.font.Font('graphics/fonts/kongtext/kongtext.ttf', 24)
+    glyph_cache = GlyphCache(font, FONT_PATH, FONT_SIZE)
 
-    text_editor = TextEditor(font, 24, 24)
+    text_editor = TextEditor(font, 24, 24, glyph_cache)
+    stopwatch.mark('font')
 
     text_editor_size = text_editor.getWidth(), text_editor.getHeight()
 
     screen = pygame.display.set_mode(text_editor_size, flags=pygame.RESIZABLE)
-
-    pygame.scrap.init()
-    pygame.scrap.set_mode(pygame.SCRAP_CLIPBOARD)
+    stopwatch.mark('display')
 
     pygame.time.set_timer(CURSORFLASH, 500)
 
-    tk_root = Tk()
-    tk_root.withdraw()
+    journal = Journal(journal_path)
 
-    return screen, text_editor
+    if journal.exists():
+        text_editor.replayJournal(journal)
 
+    text_editor.setJournal(journal)
 
-def update(text_editor: TextEditor):
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
+    buffers = BufferList(text_editor, journal_path)
+    buffers.recoverBuffers()
+    updateCaption(buffers)
 
-        if event.type == pygame.KEYDOWN:
-            text_editor.record()
+    pygame.time.set_timer(JOURNALFLUSH, JOURNAL_FLUSH_INTERVAL)
+    stopwatch.mark('journal')
 
-            if pygame.key.get_mods() & pygame.KMOD_ALT:
-                if event.key == pygame.K_c:
-                    text_editor.updateTint()
+    file_worker = FileWorker()
 
-                if event.key == pygame.K_MINUS:
-                    x, y = text_editor.getUnitSizes()
-                    text_editor.setUnitSizes(x // 2, y // 2)
-                    x, y = text_editor.getGridSizes()
-                    text_editor.setGridSizes(x * 2, y * 2)
+    return screen, buffers, file_worker
 
-                if event.key == pygame.K_EQUALS:
-                    x, y = text_editor.getUnitSizes()
-                    text_editor.setUnitSizes(x * 2, y * 2)
-                    x, y = text_editor.getGridSizes()
-                    text_editor.setGridSizes(x // 2, y // 2)
 
-                continue
+def updateCaption(buffers: BufferList):
+    if buffers.getCount() > 1:
+        pygame.display.set_caption(
+            f'Texedit.py [{buffers.getActiveIndex() + 1}/{buffers.getCount()}]')
+    else:
+        pygame.display.set_caption('Texedit.py')
 
-            if pygame.key.get_mods() & pygame.KMOD_CTRL:
-                if event.key == pygame.K_LEFT:
-                    text_editor.scrollLeft()
 
-                if event.key == pygame.K_RIGHT:
-                    text_editor.scrollRight()
+def warmGlyphs(text_editor: TextEditor):
+    glyph_cache = text_editor.getGlyphCache()
+    characters = [chr(point) for point in range(32, 127)]
 
-                if event.key == pygame.K_UP:
-                    text_editor.scrollUp()
+    for tint in text_editor.getTints():
+        glyph_cache.queueWarm(characters, text_editor.getUnitSizes(), tint)
 
-                if event.key == pygame.K_DOWN:
-                    text_editor.scrollDown()
+    pygame.time.set_timer(GLYPHWARM, 1)
 
-                if event.key == pygame.K_c:
-                    copy_text = text_editor.getLine()
 
-                    pygame.scrap.put(pygame.SCRAP_TEXT,
-                                     copy_text.encode('ascii'))
+def warmSearch(text_editor: TextEditor):
+    if text_editor.isSearching() and not text_editor.isSearchIndexWarm():
+        pygame.time.set_timer(SEARCHWARM, 1)
 
-                if event.key == pygame.K_x:
-                    copy_text = text_editor.getLine(True)
 
-                    pygame.scrap.put(pygame.SCRAP_TEXT,
-                                     copy_text.encode('ascii'))
+def applyLoaded(text_editor: TextEditor, loaded: Union[TextLayout, MappedFile]):
+    text_editor.record()
 
-                if event.key == pygame.K_v:
-                    text: str = pygame.scrap.get(
-                        pygame.SCRAP_TEXT).decode('ascii')
-                    text_editor.fillString(text)
+    if isinstance(loaded, MappedFile):
+        text_editor.openMappedFile(loaded)
+    else:
+        text_editor.fillLayout(loaded)
 
-                if event.key == pygame.K_o:
-                    if (file := askopenfile('r')):
-                        text: str = file.read()
-                        text_editor.fillString(text)
 
-                if event.key == pygame.K_s:
-                    if (file := asksaveasfile('w')):
-                        content = text_editor.getContent()
+def openFile(text_editor: TextEditor, path: str):
+    applyLoaded(text_editor, loadFile(path))
 
-                        file.write(content)
 
-                if event.key == pygame.K_l:
-                    text_editor.setCursorPosition(0, 0)
-                    text_editor.resetCanvas()
+def saveFile(text_editor: TextEditor, path: str):
+    storeFile(text_editor, path)
 
-                if event.key == pygame.K_z:
-                    text_editor.undo()
 
-                if event.key == pygame.K_y:
-                    text_editor.redo()
+def finishFile(text_editor: TextEditor, file_worker: FileWorker, task: FileTask, buffers: BufferList = None):
+    file_worker.finish(task)
+    target = task.getTextEditor() or text_editor
 
-                continue
+    if task.getError():
+        print(f'Could not {task.getMode()} {task.getPath()}: {task.getError()}',
+              file=sys.stderr)
+    elif task.getMode() == 'open':
+        if buffers:
+            applied = buffers.apply(target, lambda loaded_editor: applyLoaded(
+                loaded_editor, task.getResult()))
+        else:
+            applyLoaded(target, task.getResult())
+            applied = True
 
-            if event.key == pygame.K_LEFT:
-                text_editor.moveCursorBackwards()
+        if not applied and isinstance(task.getResult(), MappedFile):
+            task.getResult().close()
 
-            if event.key == pygame.K_RIGHT:
-                text_editor.moveCursorForwards()
+    text_editor.markAllDirty()
 
-            if event.key == pygame.K_UP:
-                text_editor.moveCursorUpwards()
 
-            if event.key == pygame.K_DOWN:
-                text_editor.moveCursorDownwards()
+def getMods(event: pygame.event.Event):
+    return event.mod if hasattr(event, 'mod') else pygame.key.get_mods()
 
-            if event.key == pygame.K_RETURN:
-                text_editor.newLine()
 
-            if event.key == pygame.K_HOME:
-                if text_editor.canvas.getDrawable(text_editor.cursor.getPosition()):
-                    text_editor.carriageReturn()
-                else:
-                    text_editor.snapCursorToLastBeforeCursor()
+def getGridPosition(text_editor: TextEditor, position: Tuple[int, int]):
+    mouse_x, mouse_y = position
+    grid_mouse_x = (mouse_x // text_editor.getUnitSizeX()
+                    ) * text_editor.getUnitSizeX()
+    grid_mouse_y = (mouse_y // text_editor.getUnitSizeY()
+                    ) * text_editor.getUnitSizeY()
 
-            if event.key == pygame.K_END:
-                if text_editor.canvas.getDrawable(text_editor.cursor.getPosition()):
-                    text_editor.carriageLimit()
-                else:
-                    text_editor.snapCursorToFirstAfterCursor()
+    return grid_mouse_x, grid_mouse_y
 
-            if event.key == pygame.K_PAGEUP:
-                if pygame.key.get_mods() & pygame.KMOD_SHIFT:
-                    width = text_editor.getWidth() // text_editor.getUnitSizeX()
 
-                    for _ in range(width):
-                        text_editor.scrollLeft()
-                else:
-                    height = text_editor.getHeight() // text_editor.getUnitSizeY()
+def getMovement(event: pygame.event.Event):
+    mods = getMods(event)
+    arrows = {pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0),
+              pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1)}
+
+    if event.type == pygame.KEYDOWN and event.key in arrows and not mods & pygame.KMOD_ALT:
+        dx, dy = arrows[event.key]
+        scroll = bool(mods & pygame.KMOD_CTRL)
+
+        if scroll and dx:
+            return None
+
+        return scroll, dx, dy, True, not scroll and bool(mods & pygame.KMOD_SHIFT)
+
+    if event.type == pygame.MOUSEBUTTONDOWN and event.button in (4, 5):
+        direction = -1 if event.button == 4 else 1
+
+        if mods & pygame.KMOD_SHIFT:
+            return True, direction, 0, False, False
+        else:
+            return True, 0, direction, False, False
+
+
+def isHistoryKey(event: pygame.event.Event, mods: int):
+    if event.key == pygame.K_F3:
+        return True
+
+    if mods & pygame.KMOD_ALT:
+        return event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+    if mods & pygame.KMOD_CTRL:
+        return event.key in (pygame.K_x, pygame.K_v, pygame.K_l, pygame.K_f, pygame.K_g,
+                             pygame.K_LEFT, pygame.K_RIGHT, pygame.K_HOME, pygame.K_END)
+
+    return event.key in (pygame.K_RETURN, pygame.K_HOME, pygame.K_END, pygame.K_TAB,
+                         pygame.K_DELETE, pygame.K_BACKSPACE) or bool(event.unicode)
+
+
+def applyMovement(text_editor: TextEditor, movement: Optional[Tuple[bool, int, int, bool, bool]]):
+    if not movement:
+        return
+
+    scroll, dx, dy, keyed, select = movement
+
+    if keyed:
+        text_editor.record()
+
+        if select:
+            text_editor.startSelection()
+        elif not scroll:
+            text_editor.clearSelection()
+
+    if scroll:
+        text_editor.scrollBy(dx * text_editor.getUnitSizeX(),
+                             dy * text_editor.getUnitSizeY())
+    else:
+        text_editor.moveCursorBy(dx, dy)
+
+
+def flushMovement(text_editor: TextEditor, movement: Optional[Tuple[bool, int, int, bool, bool]], run: List[pygame.event.Event], timings: List[Tuple[pygame.event.Event, float]] = None):
+    started = time.perf_counter()
+
+    applyMovement(text_editor, movement)
+
+    if timings != None and run:
+        elapsed = (time.perf_counter() - started) / len(run)
+
+        for event in run:
+            timings.append((event, elapsed))
+
+
+def updateSearch(text_editor: TextEditor, event: pygame.event.Event):
+    mods = getMods(event)
+    query = text_editor.getSearchQuery()
+
+    if event.key == pygame.K_ESCAPE:
+        text_editor.closeSearch()
+    elif event.key in (pygame.K_RETURN, pygame.K_F3):
+        text_editor.findNext(bool(mods & pygame.KMOD_SHIFT))
+    elif event.key == pygame.K_BACKSPACE:
+        text_editor.setSearchQuery(query[:-1])
+    elif event.unicode and event.unicode.isprintable() and not mods & (pygame.KMOD_CTRL | pygame.KMOD_ALT):
+        text_editor.setSearchQuery(query + event.unicode)
+    else:
+        return False
+
+    return True
 
-                    for _ in range(height):
-                        text_editor.scrollUp()
 
-            if event.key == pygame.K_PAGEDOWN:
-                if pygame.key.get_mods() & pygame.KMOD_SHIFT:
-                    width = text_editor.getWidth() // text_editor.getUnitSizeX()
+def updateLinePrompt(text_editor: TextEditor, event: pygame.event.Event):
+    query = text_editor.getLineQuery()
 
-                    for _ in range(width):
-                        text_editor.scrollRight()
+    if event.key == pygame.K_ESCAPE:
+        text_editor.closeLinePrompt()
+    elif event.key == pygame.K_RETURN:
+        text_editor.submitLinePrompt()
+    elif event.key == pygame.K_BACKSPACE:
+        text_editor.setLineQuery(query[:-1])
+    elif event.unicode and event.unicode.isdigit():
+        text_editor.setLineQuery(query + event.unicode)
+
+    return True
+
+
+def handleEvent(text_editor: TextEditor, file_worker: FileWorker, event: pygame.event.Event, buffers: BufferList = None):
+    mods = getMods(event)
+
+    if event.type == pygame.QUIT:
+        if buffers:
+            buffers.discardJournals()
+        elif (journal := text_editor.getJournal()):
+            journal.discard()
+
+        pygame.quit()
+        raise SystemExit
+
+    if event.type == pygame.KEYDOWN:
+        if isHistoryKey(event, mods):
+            text_editor.record()
+
+        arrows = {pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0),
+                  pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1)}
+
+        if text_editor.isSearching() and updateSearch(text_editor, event):
+            return
+
+        if text_editor.isGoingToLine() and updateLinePrompt(text_editor, event):
+            return
+
+        if event.key == pygame.K_F12:
+            PROFILER.toggleOverlay()
+            text_editor.markAllDirty()
+
+        if event.key == pygame.K_F3:
+            text_editor.findNext(bool(mods & pygame.KMOD_SHIFT))
+
+        if mods & pygame.KMOD_ALT:
+            if event.key in arrows:
+                text_editor.moveSelection(*arrows[event.key])
+
+            if event.key == pygame.K_c:
+                text_editor.updateTint()
+
+            if event.key == pygame.K_MINUS:
+                x, y = text_editor.getUnitSizes()
+                text_editor.setUnitSizes(x // 2, y // 2)
+                x, y = text_editor.getGridSizes()
+                text_editor.setGridSizes(x * 2, y * 2)
+
+            if event.key == pygame.K_EQUALS:
+                x, y = text_editor.getUnitSizes()
+                text_editor.setUnitSizes(x * 2, y * 2)
+                x, y = text_editor.getGridSizes()
+                text_editor.setGridSizes(x // 2, y // 2)
+
+            return
+
+        if mods & pygame.KMOD_CTRL:
+            if event.key == pygame.K_c:
+                if text_editor.hasSelection():
+                    putText(text_editor.getSelectionText())
+                else:
+                    putText(text_editor.getLine())
+
+            if event.key == pygame.K_x:
+                if text_editor.hasSelection():
+                    putText(text_editor.getSelectionText())
+                    text_editor.deleteSelection()
                 else:
-                    height = text_editor.getHeight() // text_editor.getUnitSizeY()
+                    putText(text_editor.getLine(True))
 
-                    for _ in range(height):
-                        text_editor.scrollDown()
+            if event.key == pygame.K_v:
+                text_editor.fillString(getText())
 
-            if event.key == pygame.K_TAB:
-                unit_size_x = text_editor.getUnitSizeX()
-                limit_x = text_editor.getLimitX()
-                cursor_x = text_editor.getCursor().getX()
+            if event.key == pygame.K_o:
+                if (file := askOpenFile('r')):
+                    file.close()
 
-                if pygame.key.get_mods() & pygame.KMOD_SHIFT:
-                    if cursor_x - 4 * unit_size_x >= 0:
-                        tab = 4
-                        for _ in range(tab):
-                            text_editor.moveCursorLeft()
+                    if file_worker:
+                        file_worker.open(file.name, text_editor)
                     else:
-                        text_editor.setCursorPosition(0)
-                else:
-                    if cursor_x + 4 * unit_size_x < limit_x:
-                        tab = 4
-                        for _ in range(tab):
-                            text_editor.moveCursorRight()
+                        openFile(text_editor, file.name)
+
+            if event.key == pygame.K_s:
+                if (path := askSavePath()):
+                    if file_worker:
+                        file_worker.save(text_editor, path)
                     else:
-                        text_editor.setCursorPosition(limit_x)
+                        saveFile(text_editor, path)
+
+            if event.key == pygame.K_l:
+                text_editor.setCursorPosition(0, 0)
+                text_editor.resetCanvas()
+
+            if event.key == pygame.K_f:
+                if text_editor.isSearching():
+                    text_editor.findNext()
+                else:
+                    text_editor.openSearch()
+
+            if event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_HOME, pygame.K_END):
+                if mods & pygame.KMOD_SHIFT:
+                    text_editor.startSelection()
+                else:
+                    text_editor.clearSelection()
+
+            if event.key == pygame.K_LEFT:
+                text_editor.jumpWordBackwards()
+
+            if event.key == pygame.K_RIGHT:
+                text_editor.jumpWordForwards()
+
+            if event.key == pygame.K_HOME:
+                text_editor.jumpToDocumentStart()
+
+            if event.key == pygame.K_END:
+                text_editor.jumpToDocumentEnd()
+
+            if event.key == pygame.K_g:
+                text_editor.openLinePrompt()
+
+            if buffers and event.key in (pygame.K_n, pygame.K_w, pygame.K_TAB, pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                if event.key == pygame.K_n:
+                    buffers.createBuffer()
+
+                if event.key == pygame.K_w:
+                    buffers.closeActive()
+
+                if event.key == pygame.K_TAB:
+                    buffers.switchBy(-1 if mods & pygame.KMOD_SHIFT else 1)
 
-                continue
+                if event.key == pygame.K_PAGEUP:
+                    buffers.switchBy(-1)
 
-            if event.key == pygame.K_DELETE:
-                text_editor.deleteUnderCursor()
-                text_editor.moveCursorForwards()
+                if event.key == pygame.K_PAGEDOWN:
+                    buffers.switchBy(1)
 
-                continue
+                updateCaption(buffers)
 
-            if event.key == pygame.K_BACKSPACE:
-                text_editor.moveCursorBackwards()
-                text_editor.deleteUnderCursor()
+            if event.key == pygame.K_z:
+                text_editor.undo()
 
-                continue
+            if event.key == pygame.K_y:
+                text_editor.redo()
 
-            if event.unicode:
-                text_editor.fillString(event.unicode)
+            return
 
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 4:
-                if pygame.key.get_mods() & pygame.KMOD_SHIFT:
-                    text_editor.scrollLeft()
+        if event.key == pygame.K_RETURN:
+            text_editor.newLine()
+
+        if event.key == pygame.K_HOME:
+            if text_editor.getDrawableUnderCursor():
+                text_editor.carriageReturn()
+            else:
+                text_editor.snapCursorToLastBeforeCursor()
+
+        if event.key == pygame.K_END:
+            if text_editor.getDrawableUnderCursor():
+                text_editor.carriageLimit()
+            else:
+                text_editor.snapCursorToFirstAfterCursor()
+
+        if event.key == pygame.K_PAGEUP:
+            if mods & pygame.KMOD_SHIFT:
+                text_editor.scrollBy(-text_editor.getWidth(), 0)
+            else:
+                text_editor.scrollBy(0, -text_editor.getHeight())
+
+        if event.key == pygame.K_PAGEDOWN:
+            if mods & pygame.KMOD_SHIFT:
+                text_editor.scrollBy(text_editor.getWidth(), 0)
+            else:
+                text_editor.scrollBy(0, text_editor.getHeight())
+
+        if event.key == pygame.K_TAB:
+            unit_size_x = text_editor.getUnitSizeX()
+            limit_x = text_editor.getLimitX()
+            cursor_x = text_editor.getCursor().getX()
+
+            if mods & pygame.KMOD_SHIFT:
+                if cursor_x - 4 * unit_size_x >= 0:
+                    tab = 4
+                    for _ in range(tab):
+                        text_editor.moveCursorLeft()
                 else:
-                    text_editor.scrollUp()
-            elif event.button == 5:
-                if pygame.key.get_mods() & pygame.KMOD_SHIFT:
-                    text_editor.scrollRight()
+                    text_editor.setCursorPosition(0)
+            else:
+                if cursor_x + 4 * unit_size_x < limit_x:
+                    tab = 4
+                    for _ in range(tab):
+                        text_editor.moveCursorRight()
                 else:
-                    text_editor.scrollDown()
-            elif event.button == 1:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                grid_mouse_x = (mouse_x // text_editor.getUnitSizeX()
-                                ) * text_editor.getUnitSizeX()
-                grid_mouse_y = (mouse_y // text_editor.getUnitSizeY()
-                                ) * text_editor.getUnitSizeY()
-                grid_mouse_pos = grid_mouse_x, grid_mouse_y
+                    text_editor.setCursorPosition(limit_x)
+
+            return
+
+        if event.key == pygame.K_ESCAPE:
+            text_editor.clearSelection()
+
+            return
+
+        if event.key in (pygame.K_DELETE, pygame.K_BACKSPACE) and text_editor.hasSelection():
+            text_editor.deleteSelection()
+
+            return
+
+        if event.key == pygame.K_DELETE:
+            text_editor.deleteUnderCursor()
+            text_editor.moveCursorForwards()
+
+            return
+
+        if event.key == pygame.K_BACKSPACE:
+            text_editor.moveCursorBackwards()
+            text_editor.deleteUnderCursor()
+
+            return
+
+        if event.unicode:
+            text_editor.fillString(event.unicode)
+
+    if event.type == pygame.MOUSEBUTTONDOWN:
+        if event.button == 1:
+            if mods & pygame.KMOD_SHIFT:
+                text_editor.startSelection()
+            else:
+                text_editor.clearSelection()
+
+            text_editor.setCursorPosition(*getGridPosition(text_editor, event.pos))
+
+    if event.type == pygame.MOUSEMOTION and event.buttons[0] and text_editor.hasSelection():
+        text_editor.setCursorPosition(*getGridPosition(text_editor, event.pos))
+
+    if event.type == pygame.VIDEORESIZE:
+        new_grid_x = event.w // text_editor.getUnitSizeX()
+        new_grid_y = event.h // text_editor.getUnitSizeY()
+
+        text_editor.setGridSizes(new_grid_x, new_grid_y)
+
+        pygame.display.set_mode(
+            (text_editor.getWidth(), text_editor.getHeight()), flags=pygame.RESIZABLE)
+
+    if event.type == CURSORFLASH:
+        text_editor.cursorFlash()
+
+    if event.type == JOURNALFLUSH:
+        text_editor.flushJournal()
+
+    if event.type == GLYPHWARM and not text_editor.getGlyphCache().warmStep():
+        pygame.time.set_timer(GLYPHWARM, 0)
+
+    if event.type == SEARCHWARM and not (text_editor.isSearching() and text_editor.warmSearchIndex()):
+        pygame.time.set_timer(SEARCHWARM, 0)
+
+    if event.type == FILEDONE and file_worker:
+        finishFile(text_editor, file_worker, event.task, buffers)
+
+
+def update(text_editor: TextEditor, file_worker: FileWorker = None, wait: bool = False, recorder: InputRecorder = None, timings: List[Tuple[pygame.event.Event, float]] = None, events: List[pygame.event.Event] = None, buffers: BufferList = None):
+    if events == None:
+        events = pygame.event.get()
+
+        if not events and wait:
+            events = [pygame.event.wait()] + pygame.event.get()
+
+    if recorder:
+        recorder.record(events)
+
+    movement: Optional[Tuple[bool, int, int, bool, bool]] = None
+    run: List[pygame.event.Event] = []
+
+    for event in events:
+        step = None if text_editor.isGoingToLine() else getMovement(event)
+
+        if step and movement and movement[0] == step[0] and movement[4] == step[4]:
+            movement = step[0], movement[1] + step[1], movement[2] + \
+                step[2], movement[3] or step[3], step[4]
+            run.append(event)
+            continue
+
+        flushMovement(text_editor, movement, run, timings)
+
+        if step:
+            movement, run = step, [event]
+            continue
+
+        movement, run = None, []
+        started = time.perf_counter()
+
+        handleEvent(text_editor, file_worker, event, buffers)
+
+        if buffers:
+            text_editor = buffers.getActive()
 
-                text_editor.setCursorPosition(*grid_mouse_pos)
+        if timings != None:
+            timings.append((event, time.perf_counter() - started))
 
-        if event.type == pygame.VIDEORESIZE:
-            new_grid_x = event.w // text_editor.getUnitSizeX()
-            new_grid_y = event.h // text_editor.getUnitSizeY()
+    flushMovement(text_editor, movement, run, timings)
 
-            text_editor.setGridSizes(new_grid_x, new_grid_y)
 
-            pygame.display.set_mode(
-                (text_editor.getWidth(), text_editor.getHeight()), flags=pygame.RESIZABLE)
+def drawProgress(screen: pygame.Surface, progress: float):
+    width, height = screen.get_size()
+    rect = pygame.Rect(0, height - 4, width, 4)
 
-        if event.type == CURSORFLASH:
-            text_editor.cursorFlash()
+    screen.fill((64, 64, 64), rect)
+    screen.fill((255, 255, 255), (rect.x, rect.y,
+                                  int(rect.w * min(progress, 1)), rect.h))
 
+    return rect
 
-def draw(text_editor: TextEditor, screen: pygame.Surface):
-    drawables = text_editor.getCanvas().getDrawables().items()
+
+def drawPrompt(screen: pygame.Surface, text_editor: TextEditor, text: str):
+    glyph_cache = text_editor.getGlyphCache()
+    unit_size_x, unit_size_y = text_editor.getUnitSizes()
+    text = text[:text_editor.getGridSizes()[0]]
+    rect = pygame.Rect(0, text_editor.getHeight() - unit_size_y,
+                       text_editor.getWidth(), unit_size_y)
+
+    screen.fill((0, 0, 0), rect)
+
+    for index, character in enumerate(text):
+        screen.blit(glyph_cache.getGlyph(character, (unit_size_x, unit_size_y),
+                                         SEARCH_TINT), (index * unit_size_x, rect.y))
+
+    return rect
+
+
+def drawOverlays(text_editor: TextEditor, screen: pygame.Surface, rect: pygame.Rect, highlighted: Set[Tuple[int, int]], selection: Optional[pygame.Rect]):
+    canvas = text_editor.getCanvas()
+    glyph_cache = text_editor.getGlyphCache()
+    viewport = text_editor.getViewport()
+
+    for position in highlighted:
+        if (drawable := canvas.getDrawable(position)):
+            screen.blit(glyph_cache.getGlyph(
+                drawable[0], drawable[2], SEARCH_TINT), text_editor.toScreenPosition(position))
+
+    if selection and (area := selection.clip(rect)):
+        screen.fill(SELECTION_TINT, area.move(-viewport[0], -viewport[1]),
+                    special_flags=pygame.BLEND_RGB_ADD)
+
+
+def draw(text_editor: TextEditor, screen: pygame.Surface, file_worker: FileWorker = None):
+    progress_changed = file_worker.popChanged() if file_worker else False
+    redraw, dirty = text_editor.popDirty()
+
+    if not redraw and not dirty and not progress_changed:
+        return False
+
+    canvas = text_editor.getCanvas()
+    glyph_cache = text_editor.getGlyphCache()
+    tile_cache = text_editor.getTileCache()
     cursor = text_editor.getCursor()
     tint = text_editor.getTint()
     scale = text_editor.getUnitSizes()
+    viewport = text_editor.getViewport()
+
+    tile_cache.setUnitSizes(scale)
+
+    if text_editor.popStale():
+        tile_cache.clear()
+
+    for position, size in dirty.items():
+        tile_cache.repaint(canvas, position, size)
+
+    highlights = text_editor.getSearchHighlights()
+
+    if (selection := text_editor.getSelectionRect()):
+        selection = pygame.Rect(selection)
+
+    view = pygame.Rect(viewport, (text_editor.getWidth(),
+                                  text_editor.getHeight()))
+
+    if redraw:
+        screen.fill((0, 0, 0))
+        tile_cache.compose(screen, canvas, viewport, view)
+        drawOverlays(text_editor, screen, view, highlights, selection)
+    else:
+        for position, size in dirty.items():
+            if (rect := view.clip(pygame.Rect(position, size))):
+                tile_cache.compose(screen, canvas, viewport, rect)
+                highlighted = highlights.intersection([position]) if tuple(size) == scale else {
+                    highlight for highlight in highlights if rect.collidepoint(highlight)}
+
+                drawOverlays(text_editor, screen, rect,
+                             highlighted, selection)
+
+    screen.blit(glyph_cache.getGlyph(text_editor.getCursorCharacter(),
+                                     scale, tint), cursor.getPosition())
+
+    rects = [pygame.Rect(text_editor.toScreenPosition(position), size)
+             for position, size in dirty.items()]
+
+    if text_editor.isSearching():
+        rects.append(drawPrompt(screen, text_editor,
+                     f'/{text_editor.getSearchQuery()}'))
+    elif text_editor.isGoingToLine():
+        rects.append(drawPrompt(screen, text_editor,
+                     f':{text_editor.getLineQuery()}'))
+
+    if PROFILER.isOverlayVisible():
+        rects.append(PROFILER.drawOverlay(screen, FONT_PATH))
+
+    if file_worker and (progress := file_worker.getProgress()) != None:
+        rects.append(drawProgress(screen, progress))
+
+    if redraw:
+        pygame.display.update()
+    else:
+        pygame.display.update(rects)
+
+    return True
+
+
+def getProfileCounters(text_editor: TextEditor):
+    tile_cache = text_editor.getTileCache()
+
+    return {'blits': tile_cache.getTileBlits() + tile_cache.getCellBlits(),
+            'glyph_allocations': text_editor.getGlyphCache().getAllocations(),
+            'tile_renders': tile_cache.getRenders()}
+
+
+def profileFrame(text_editor: TextEditor, before: dict, timings: List[Tuple[pygame.event.Event, float]], draw_time: float):
+    history = text_editor.getHistory()
+    after = getProfileCounters(text_editor)
+
+    PROFILER.endFrame({'update_ms': sum(elapsed for _, elapsed in timings) * 1000,
+                       'draw_ms': draw_time * 1000,
+                       'events': len(timings),
+                       **{name: after[name] - before[name] for name in after},
+                       'cells': text_editor.getCanvas().getCount(),
+                       'scrolls': PROFILER.getCount('setViewport'),
+                       'scroll_ms': PROFILER.getTime('setViewport') * 1000,
+                       'record_calls': PROFILER.getCount('record'),
+                       'record_ms': PROFILER.getTime('record') * 1000,
+                       'history_changes': history.getChangeCount(),
+                       'history_bytes': history.getMemoryEstimate()})
+
+
+def loop(max_framerate: int = MAX_FRAMERATE):
+    stopwatch = Stopwatch(STARTED)
+    screen, buffers, file_worker = setup(stopwatch=stopwatch)
+    text_editor = buffers.getActive()
+    clock = pygame.time.Clock()
+
+    text_editor.markAllDirty()
+    draw(text_editor, screen, file_worker)
+    stopwatch.mark('first frame')
+
+    warmGlyphs(text_editor)
+
+    if os.environ.get(STARTUP_REPORT_VARIABLE):
+        print(stopwatch.report(), file=sys.stderr)
+
+    recorder = InputRecorder(path, (FILEPROGRESS, FILEDONE)) if (
+        path := os.environ.get(TRACE_VARIABLE)) else None
 
-    screen.fill((0, 0, 0))
+    if (path := os.environ.get(PROFILE_VARIABLE)):
+        PROFILER.openLog(path)
 
-    for position, drawable in drawables:
-        screen.blit(
-            getTinted(getScaled(drawable[1], drawable[2]), drawable[3]), position)
+    try:
+        while True:
+            if (profiling := PROFILER.isEnabled()):
+                before = getProfileCounters(text_editor)
+                timings: List[Tuple[pygame.event.Event, float]] = []
 
-    screen.blit(getTinted(getScaled(cursor.getSurface(), scale),
-                          tint), cursor.getPosition())
+            update(text_editor, file_worker, True,
+                   recorder, timings if profiling else None, buffers=buffers)
 
-    pygame.display.update()
+            text_editor = buffers.getActive()
+            warmSearch(text_editor)
+            started = time.perf_counter()
 
+            if draw(text_editor, screen, file_worker):
+                if profiling:
+                    profileFrame(text_editor, before, timings,
+                                 time.perf_counter() - started)
 
-def loop():
-    screen, text_editor = setup()
+                if max_framerate:
+                    clock.tick(max_framerate)
+    finally:
+        if recorder:
+            recorder.close()
 
-    while True:
-        update(text_editor)
-        draw(text_editor, screen)
+        PROFILER.closeLog()
 
 
-loop()
+if __name__ == '__main__':
+    loop()
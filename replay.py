@@ -0,0 +1,130 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import json
+import sys
+import time
+from argparse import ArgumentParser
+from statistics import mean, median
+from typing import Dict, List
+
+import pygame
+
+from classes.buffer_list import BufferList
+from classes.editor import TextEditor
+from classes.glyph_cache import GlyphCache
+from classes.input_trace import InputTrace
+from constants import CURSORFLASH, FONT_PATH, FONT_SIZE, GLYPHWARM, JOURNALFLUSH
+from game import draw, update
+from utils.clipboard import putText
+
+EVENT_NAMES: Dict[int, str] = {CURSORFLASH: 'CursorFlash',
+                               JOURNALFLUSH: 'JournalFlush', GLYPHWARM: 'GlyphWarm'}
+
+SKIPPED_KEYS = pygame.K_o, pygame.K_s
+
+
+def setup():
+    pygame.display.init()
+    pygame.font.init()
+
+    font = pygame.font.Font(FONT_PATH, FONT_SIZE)
+
+    glyph_cache = GlyphCache(font, FONT_PATH, FONT_SIZE)
+
+    text_editor = TextEditor(font, 24, 24, glyph_cache)
+
+    pygame.display.set_mode(
+        (text_editor.getWidth(), text_editor.getHeight()), flags=pygame.RESIZABLE)
+
+    return BufferList(text_editor)
+
+
+def getEventName(event: pygame.event.Event):
+    return EVENT_NAMES.get(event.type) or pygame.event.event_name(event.type)
+
+
+def isReplayable(event: pygame.event.Event):
+    if event.type == pygame.QUIT:
+        return False
+
+    if event.type == pygame.KEYDOWN and event.mod & pygame.KMOD_CTRL and event.key in SKIPPED_KEYS:
+        return False
+
+    return True
+
+
+def summarize(samples: List[float]):
+    samples = sorted(samples)
+
+    return {'count': len(samples),
+            'total_ms': sum(samples),
+            'mean_ms': mean(samples),
+            'median_ms': median(samples),
+            'p95_ms': samples[min(int(len(samples) * 0.95), len(samples) - 1)],
+            'max_ms': samples[-1]}
+
+
+def replay(path: str):
+    buffers = setup()
+    event_samples: Dict[str, List[float]] = {}
+    frame_samples: List[float] = []
+    recorded_ms = 0.0
+    skipped = 0
+    started = time.perf_counter()
+
+    for recorded_ms, events in InputTrace(path):
+        replayable = [event for event in events if isReplayable(event)]
+        skipped += len(events) - len(replayable)
+
+        for event in replayable:
+            if hasattr(event, 'clipboard'):
+                putText(event.clipboard)
+
+        timings: List = []
+
+        update(buffers.getActive(), timings=timings,
+               events=replayable, buffers=buffers)
+
+        for event, elapsed in timings:
+            event_samples.setdefault(getEventName(event), []).append(
+                elapsed * 1000)
+
+        frame_started = time.perf_counter()
+
+        if draw(buffers.getActive(), pygame.display.get_surface()):
+            frame_samples.append(
+                (time.perf_counter() - frame_started) * 1000)
+
+    return {'trace': path,
+            'python': sys.version.split()[0],
+            'pygame': pygame.version.ver,
+            'recorded_ms': recorded_ms,
+            'replay_ms': (time.perf_counter() - started) * 1000,
+            'skipped_events': skipped,
+            'events': {name: summarize(samples) for name, samples in sorted(event_samples.items())},
+            'frames': summarize(frame_samples) if frame_samples else {'count': 0}}
+
+
+def main():
+    parser = ArgumentParser(
+        description='Replay a recorded input trace headlessly and time it.')
+    parser.add_argument('trace')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    report = replay(args.trace)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+import pygame
+
+scrap_ready = False
+
+local_text = ''
+
+
+def initScrap():
+    global scrap_ready
+
+    if not scrap_ready:
+        pygame.scrap.init()
+        pygame.scrap.set_mode(pygame.SCRAP_CLIPBOARD)
+        scrap_ready = True
+
+
+def putText(text: str):
+    global local_text
+
+    local_text = text
+
+    try:
+        initScrap()
+        pygame.scrap.put(pygame.SCRAP_TEXT, text.encode('ascii'))
+    except pygame.error:
+        pass
+
+
+def getText():
+    try:
+        initScrap()
+
+        if (data := pygame.scrap.get(pygame.SCRAP_TEXT)) != None:
+            return data.decode('ascii')
+    except pygame.error:
+        pass
+
+    return local_text
@@ -0,0 +1,31 @@
+from typing import IO, Optional
+
+tk_root = None
+
+
+def getTkRoot():
+    global tk_root
+
+    if tk_root == None:
+        from tkinter import Tk
+
+        tk_root = Tk()
+        tk_root.withdraw()
+
+    return tk_root
+
+
+def askOpenFile(mode: str = 'r') -> Optional[IO[str]]:
+    from tkinter.filedialog import askopenfile
+
+    getTkRoot()
+
+    return askopenfile(mode)
+
+
+def askSavePath() -> Optional[str]:
+    from tkinter.filedialog import asksaveasfilename
+
+    getTkRoot()
+
+    return asksaveasfilename() or None
@@ -0,0 +1,70 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Callable, Iterable, List, Tuple
+
+
+def getLineChunks(path: str, count: int, min_size: int = 65536):
+    size = os.path.getsize(path)
+    count = max(min(count, size // max(min_size, 1)), 1)
+    bounds = [0]
+
+    with open(path, 'rb') as file:
+        for index in range(1, count):
+            file.seek(max(size * index // count, bounds[-1]))
+            file.readline()
+
+            if bounds[-1] < (position := file.tell()) < size:
+                bounds.append(position)
+
+    bounds.append(size)
+
+    return list(zip(bounds, bounds[1:]))
+
+
+def mapChunks(function: Callable, path: str, chunks: List[Tuple[int, int]], *args, workers: int = None, progress: Callable[[float], None] = None):
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = [executor.submit(function, path, start, end, index == len(chunks) - 1, *args)
+                       for index, (start, end) in enumerate(chunks)]
+
+            for count, future in enumerate(futures, 1):
+                yield future.result()
+
+                if progress:
+                    progress(count / len(futures))
+    else:
+        for count, (start, end) in enumerate(chunks, 1):
+            yield function(path, start, end, count == len(chunks), *args)
+
+            if progress:
+                progress(count / len(chunks))
+
+
+def iterProgress(pieces: Iterable[str], total: int, progress: Callable[[float], None] = None):
+    total = max(total, 1)
+
+    for count, piece in enumerate(pieces, 1):
+        yield piece
+
+        if progress:
+            progress(count / total)
+
+
+def writeChunked(file: IO[str], pieces: Iterable[str], chunk_size: int = 65536):
+    chunk = []
+    length = 0
+
+    for piece in pieces:
+        chunk.append(piece)
+        length += len(piece)
+
+        if length >= chunk_size:
+            file.write(''.join(chunk))
+            chunk = []
+            length = 0
+
+    if chunk:
+        file.write(''.join(chunk))
@@ -4,7 +4,7 @@ import pygame
 
 
 def getTinted(surface: pygame.Surface, color: Tuple[int, ...]):
-    surface = surface.copy().convert()
+    surface = surface.convert()
 
     surface.fill(color, special_flags=pygame.BLEND_RGBA_ADD)
 
@@ -12,6 +12,7 @@ def getTinted(surface: pygame.Surface, color: Tuple[int, ...]):
 
 
 def getScaled(surface: pygame.Surface, size: Tuple[int, int]):
-    surface = surface.copy().convert()
+    if surface.get_size() == tuple(size):
+        return surface.convert()
 
-    return pygame.transform.scale(surface, size)
+    return pygame.transform.scale(surface, size).convert()